@@ -5,21 +5,50 @@
 import hlt
 from hlt import constants, commands
 from hlt.positionals import Direction, Position
-import math, logging, time, numpy as np
+from hlt.endgame import EndgameScheduler
+from hlt.missions import Mode, MissionPlanner
+from hlt.opponents import OpponentTracker
+from hlt.parameters import Parameters
+from hlt.rollouts import EconomyState, Option, RolloutEngine
+from hlt.traffic import Intent, TrafficController
+import math, logging, os, sys, time, numpy as np
 
 game = hlt.Game()
 
+# Heuristics constants, can be overridden with --params <file.json>
+params = Parameters.from_args(sys.argv)
+
 # Global varaibles
-interesting_treshold = 5 / 100
+interesting_treshold = params.interesting_treshold
+# Missions are kept across turns, ships are re-planned only when their mission is stale
+missions = MissionPlanner()
+# Last returns of the ships, considering the throughput of dropoffs
+endgame = EndgameScheduler(margin=params.endgame_margin)
+# Trajectories of opponent ships, to predict where they move next turn
+opponents = OpponentTracker(game.my_id)
+# Forward model of the economy, to decide spawns and dropoffs
+rollouts = RolloutEngine(return_ratio=params.return_ratio)
+# Dropoff verdicts of the current turn, by ship id: (turn, worth)
+dropoff_verdicts = {}
+# Joint moves of our ships around our structures, with inbound and outbound lanes
+traffic = TrafficController(game.game_map)
 
 game.ready("shuzuiBot")
+# Record binary snapshots of the game for offline analysis when a directory is given
+if os.environ.get("HALITE_SNAPSHOT_DIR"):
+    game.record_snapshots(os.path.join(os.environ["HALITE_SNAPSHOT_DIR"],
+                                       "{}-{}".format(int(time.time() * 1000), game.my_id)))
 logging.info("Successfully created bot! My Player ID is {}.".format(game.my_id))
+logging.info("Parameters: {}".format(params))
 
 def mark_safe(cell):
     cell.ship = None
 
-def mark_reserved(cell):
-    cell.reserved = True
+def mark_reserved(position):
+    game_map.layers.reserved.set(position)
+
+def mark_planned(ship, position):
+    game_map.layers.planned.set(position, ship.id)
 
 def has_fuel(ship):
     return ship.halite_amount >= game_map[ship.position].halite_amount * 10 / 100
@@ -27,24 +56,24 @@ def has_fuel(ship):
 def fleet_size():
     return len(me.get_ships())
 
-def is_reserved(cell):
-    if hasattr(cell, 'reserved'):
-        return cell.reserved
-    else:
-        return False
+def is_reserved(position):
+    return game_map.layers.reserved.get(position)
 
 def has_defended_dropoff(position):
-    cell = game_map[position]
-    if hasattr(cell, 'defended'):
-        return cell.defended
-    else:
-        cell.defended = True
-        return False
+    # Only one ship per turn is sent on an attacked dropoff
+    if game_map.layers.defended.get(position):
+        return True
+    game_map.layers.defended.set(position)
+    return False
 
 def is_dropoff_attacked(position):
     cell = game_map[position]
     return cell.is_occupied and not me.has_ship(cell.ship.id)
 
+def is_risky(position):
+    # Opponent ships are likely to move on this cell next turn
+    return enemy_danger[position.y][position.x] > params.enemy_risk_treshold
+
 def is_interesting(cell):
     return cell.halite_amount > constants.MAX_HALITE * interesting_treshold
 
@@ -55,9 +84,12 @@ def grid_distance_to_dropoff(ship):
     return grid_distance(ship.position, closest_dropoff(ship))
 
 def need_to_rush(ship):
+    if endgame.get(ship.id) is not None:
+        return endgame.is_due(ship.id, game.turn_number)
+
     # Add arbitrary constant to distance considering that the ship may be blocked during X turns
     remaining_turns = constants.MAX_TURNS - game.turn_number
-    return  distance_to_dropoff(ship) + 7 >= remaining_turns
+    return  distance_to_dropoff(ship) + params.rush_margin >= remaining_turns
 
 def grid_distance(position_A, position_B):
     # compute distance with 8 connectivity between two positions
@@ -76,14 +108,15 @@ def grid_distance(position_A, position_B):
 
     return int(math.sqrt(2) * diagonal_steps + straight_steps)
 
-def closest_dropoff(ship):
-    dropoffs = me.get_dropoffs()
-    positions = [drop.position for drop in dropoffs]
+def dropoff_positions():
+    positions = [drop.position for drop in me.get_dropoffs()]
     positions.append(me.shipyard.position)
+    return positions
 
+def closest_dropoff(ship):
     best_dropoff = None
     min_distance = math.inf
-    for position in positions:
+    for position in dropoff_positions():
         distance = game_map.calculate_distance(ship.position, position)
         if distance < min_distance:
             min_distance = distance
@@ -91,6 +124,64 @@ def closest_dropoff(ship):
 
     return best_dropoff
 
+def return_dropoff(ship):
+    # Rushing ships go to the dropoff given by the end-game schedule
+    departure = endgame.get(ship.id)
+    if departure is not None and need_to_rush(ship):
+        return departure.dropoff
+    return closest_dropoff(ship)
+
+def economy_state():
+    ships = me.get_ships()
+    trip_distance = sum(distance_to_dropoff(ship) for ship in ships) / len(ships) if ships else game_map.width / 4
+    opponent_ships = sum(len(player.get_ships()) for player in game.players.values() if player.id != me.id)
+    # Ships move on depleted cells, cells above the treshold being mined by the ships going through them
+    path_halite = min(np.percentile(game_map.interest.halite, params.path_halite_percentile),
+                      constants.MAX_HALITE * interesting_treshold)
+    return EconomyState(constants.MAX_TURNS - game.turn_number, len(ships), me.halite_amount,
+                        game_map.halite_index.total_halite, game_map.width * game_map.height,
+                        opponent_ships, trip_distance, path_halite)
+
+def is_dropoff_worth(ship):
+    # Evaluated once per ship and turn, make_decisions may ask again for a blocked ship
+    turn, worth = dropoff_verdicts.get(ship.id, (None, None))
+    if turn != game.turn_number:
+        worth = evaluate_dropoff(ship)
+        dropoff_verdicts[ship.id] = (game.turn_number, worth)
+    return worth
+
+def evaluate_dropoff(ship):
+    # Only a neighborhood close to the richest one around the ship is a candidate site
+    interest = game_map.interest
+    richest = interest.local_max(ship.position, params.dropoff_site_radius)
+    if interest[ship.position] < richest * params.dropoff_site_ratio:
+        return False
+
+    # Compare building a dropoff here now, later, or not at all
+    ships = me.get_ships()
+    distances = [game_map.calculate_distance(other.position, ship.position) for other in ships]
+    closer = [distance for other, distance in zip(ships, distances) if distance < distance_to_dropoff(other)]
+    # Ships around a dropoff mine at 2/3 of the scanned radius on average
+    build = dict(dropoff_share=len(closer) / len(ships), dropoff_trip=2 * interest.radius / 3,
+                 dropoff_halite=interest[ship.position], dropoff_cells=interest.cells,
+                 dropoff_map_trip=sum(closer) / len(closer) if closer else None)
+    options = [Option(dropoff_in=0, **build), Option(dropoff_in=params.dropoff_delay, **build), Option()]
+    deadline = min(turn_deadline, time.time() + params.dropoff_time_slice)
+    return rollouts.best(economy_state(), options, deadline) == 0
+
+def should_spawn():
+    # Ships of ours around the shipyard are moved by the traffic controller to leave it free
+    if me.halite_amount < constants.SHIP_COST or is_dropoff_attacked(me.shipyard.position):
+        return False
+    early = game.turn_number <= constants.MAX_TURNS * params.spawn_turns_ratio
+    if early and fleet_size() < params.min_fleet:
+        # Always build a minimum fleet during the first part of the game, whatever the rollouts say
+        return True
+    if time.time() >= turn_deadline:
+        # No time left to evaluate, keep creating ships during the first part of the game
+        return early
+    return rollouts.best(economy_state(), [Option(), Option(spawn=True)], turn_deadline) == 1
+
 def get_unsafe_positions(ship, destination):
     directions = game_map.get_unsafe_moves(ship.position, destination)
     positions = []
@@ -113,60 +204,77 @@ def order_by_distance(ships):
 
     return ordered_ships
 
-def create_scanned_map(range=5):
-    scanned = np.zeros((game_map.width, game_map.height))
-
-    for i in range(game_map.width):
-        for j in range(game_map.height):
-            scanned[i][j] = compute_interest(i, j, range)
-
-def best_around(ship, i=1):
-    # Reset recursion when no cell greater than intresting treshold found
+def best_around(ship):
+    # Best cell by halite per turn needed to reach it, looked up in the halite index of the map
     global interesting_treshold
-    if(i > game_map.width):
-        interesting_treshold -= 1 / 100
-        return best_around(ship)
-
-    # Create a list of positions around the ship reachable in (i+1) turns, recursively
-    x = ship.position.x
-    y = ship.position.y
-    surrounding = []
-    for k in range(-i, i+1):
-        for s in range(-i, i+1):
-            # Keep only edges since it is recursive
-            if (abs(k) + abs(s)) == i:
-                position = Position(x+k, y+s)
-                normalized = game_map.normalize(position)
-                surrounding.append(normalized)
-
-    best_position = None
-    best_score = -1
-    for position in surrounding:
+    def is_available(position):
         cell = game_map[position]
-        if cell.is_empty and not is_reserved(cell) and is_interesting(cell) and cell.halite_amount > best_score:
-            best_score = cell.halite_amount
-            best_position = position
+        return cell.is_empty and not is_reserved(position) and not missions.is_targeted(position, ship.id)
 
-    if best_position is None:
-        return best_around(ship, i+1)
-    else:
-        return best_position
+    def score(position):
+        # Cells in a rich neighborhood keep the ship mining once there
+        interest = game_map.interest
+        distance = game_map.calculate_distance(ship.position, position)
+        return (game_map[position].halite_amount + interest[position] / interest.cells) / (distance + 1)
+
+    while True:
+        min_halite = int(constants.MAX_HALITE * interesting_treshold) + 1
+        found = game_map.halite_index.best_by_distance(ship.position, k=params.target_candidates,
+                                                       min_halite=min_halite, accept=is_available)
+        if found:
+            return max(found, key=score)
+        if interesting_treshold <= 0:
+            # Nothing left to mine around, head to the richest neighborhood
+            found = game_map.interest.best_by_distance(ship.position, accept=is_available)
+            return found[0] if found else ship.position
+        # Lower the treshold when no cell greater than intresting treshold found
+        interesting_treshold -= 1 / 100
 
-def find_destination(ship):
-    if need_to_rush(ship) or ship.halite_amount > constants.MAX_HALITE * 95 / 100:
+def is_target_taken(ship, target):
+    cell = game_map[target]
+    return (cell.is_occupied and cell.ship.id != ship.id) or missions.is_targeted(target, ship.id)
+
+def is_mission_stale(mission, ship):
+    # A mission is kept until one of its triggers fires
+    if mission.mode in (Mode.DEFEND, Mode.BUILD_DROPOFF):
+        # Only last one turn
+        return True
+    if mission.mode == Mode.RETURN:
+        # Deposit done, or a closer dropoff has been built meanwhile
+        return (ship.halite_amount == 0 and not need_to_rush(ship)) or mission.target != return_dropoff(ship)
+
+    # Rush deadline reached or cargo crossed the upper treshold
+    if need_to_rush(ship) or ship.halite_amount > constants.MAX_HALITE * params.return_full_ratio:
+        return True
+    if mission.mode == Mode.MINE:
+        return mission.target != ship.position or not is_interesting(game_map[ship.position])
+
+    # Explore: target reached, depleted or taken, or something interesting found on the way
+    return mission.target == ship.position or not is_interesting(game_map[mission.target]) or \
+        is_target_taken(ship, mission.target) or is_interesting(game_map[ship.position]) or \
+        ship.halite_amount > constants.MAX_HALITE * params.return_ratio
+
+def plan_mission(ship):
+    if need_to_rush(ship) or ship.halite_amount > constants.MAX_HALITE * params.return_full_ratio:
         # When a ship is almost fully loaded or just have time to return a dropoff, then return to dropoff
-        destination = closest_dropoff(ship)
+        mode, target = Mode.RETURN, return_dropoff(ship)
     elif is_interesting(game_map[ship.position]):
         # Keep collecting halite under the ship while the amount is interesting enough to collect
-        destination = ship.position
-    elif ship.halite_amount > constants.MAX_HALITE * 85 / 100:
+        mode, target = Mode.MINE, ship.position
+    elif ship.halite_amount > constants.MAX_HALITE * params.return_ratio:
         # Lower bound of treshold to go back to a dropoff
-        destination = closest_dropoff(ship)
+        mode, target = Mode.RETURN, closest_dropoff(ship)
     else:
         # Find the most interesting around the ship and move on it
-        destination = best_around(ship)
+        mode, target = Mode.EXPLORE, best_around(ship)
 
-    return destination
+    return missions.assign(ship.id, mode, target, game.turn_number)
+
+def find_destination(ship):
+    mission = missions.get(ship.id)
+    if mission is None:
+        mission = plan_mission(ship)
+    return mission.target
 
 def safe_direction_to(ship, destination):
     # When there is multiple possibilities to reach destination, choose direction with lower cost
@@ -180,7 +288,7 @@ def safe_direction_to(ship, destination):
         target_cell = game_map[target_pos]
         cost = game_map[target_pos].halite_amount
         if cost < lowest_cost:
-            if not target_cell.is_occupied:
+            if not target_cell.is_occupied and not is_risky(target_cell.position):
                  choice = direction
 
     return choice
@@ -190,21 +298,23 @@ def navigate_to(ship, destination):
         return Direction.Still
 
     if need_to_rush(ship):
-        distance = distance_to_dropoff(ship)
+        dropoff_pos = return_dropoff(ship)
+        distance = game_map.calculate_distance(ship.position, dropoff_pos)
         if distance == 0:
             return Direction.Still
         elif distance == 1:
             # Ignore collisions over dropoffs cells
-            return game_map.get_unsafe_moves(ship.position, closest_dropoff(ship))[0]
+            return game_map.get_unsafe_moves(ship.position, dropoff_pos)[0]
         else:
             # Return to dropoff safely
-            return safe_direction_to(ship, closest_dropoff(ship))
+            return safe_direction_to(ship, dropoff_pos)
 
     dropoff_pos = closest_dropoff(ship)
     dropoff_dist = game_map.calculate_distance(ship.position, dropoff_pos)
     if dropoff_dist == 1 and is_dropoff_attacked(dropoff_pos) and not has_defended_dropoff(dropoff_pos):
         # If an enemy is on a dropoff, use one ship to collide with it on dropoff position
         # When spawn is blocked by an enemy, use only one ship to make the way, others wait
+        missions.assign(ship.id, Mode.DEFEND, dropoff_pos, game.turn_number)
         return game_map.get_unsafe_moves(ship.position, dropoff_pos)[0]
 
     return safe_direction_to(ship, destination)
@@ -213,10 +323,10 @@ def find_crossing_ship(ship_A, destination_A, ships_play_order):
     position_A = ship_A.position
     moves_A = get_unsafe_positions(ship_A, destination_A)
 
-    for ship_id in ships_play_order:
-        ship_B = me.get_ship(ship_id)
-
-        if not has_fuel(ship_B) or ship_id == ship_A.id:
+    # Only ships next to ship_A can swap with it
+    crossing_ships = []
+    for ship_B in game_map.ship_index.adjacent(position_A, owner=me.id):
+        if ship_B.id not in ships_play_order or not has_fuel(ship_B):
             continue
 
         position_B = ship_B.position
@@ -224,16 +334,85 @@ def find_crossing_ship(ship_A, destination_A, ships_play_order):
         moves_B = get_unsafe_positions(ship_B, destination_B)
 
         if position_A in moves_B and position_B in moves_A:
-            return ship_B
+            crossing_ships.append(ship_B)
+
+    if not crossing_ships:
+        return None
+    # Keep the play order priority between candidates
+    return min(crossing_ships, key=lambda ship: ships_play_order.index(ship.id))
+
+def mark_moving(ship, direction, destination):
+    target_pos = ship.position.directional_offset(direction)
+    game_map[target_pos].mark_unsafe(ship)
+    mark_planned(ship, target_pos)
+    mark_reserved(destination)
+
+def resolve_structures_traffic(ships_play_order, command_queue, spawn):
+    # Ships around our structures are moved jointly, so that returning and leaving ships do not block each other
+    # Returns whether the shipyard is left free for the spawn, when one is wanted
+    spawn_free = spawn
+    for structure in dropoff_positions():
+        if is_dropoff_attacked(structure):
+            # Left to navigate_to, which sends a ship to defend it
+            continue
+        ships = [ship for ship in game_map.ship_index.ships_within(structure, traffic.radius, owner=me.id)
+                 if ship.id in ships_play_order]
+        if not ships:
+            continue
 
-    return None
+        intents = {}
+        for ship in ships:
+            destination = find_destination(ship)
+            if missions.get(ship.id).mode == Mode.RETURN and destination == structure:
+                intents[ship.id] = (Intent.INBOUND, structure)
+            else:
+                intents[ship.id] = (Intent.OUTBOUND, destination)
+
+        # Cells held by other ships, including the moves already planned around another structure
+        window = {ship.id for ship in ships}
+        blocked = set()
+        for dy in range(-traffic.radius - 1, traffic.radius + 2):
+            span = traffic.radius + 1 - abs(dy)
+            for dx in range(-span, span + 1):
+                cell = game_map[Position(structure.x + dx, structure.y + dy)]
+                if cell.is_occupied and cell.ship.id not in window:
+                    blocked.add((cell.position.x, cell.position.y))
+
+        at_shipyard = structure == me.shipyard.position
+        # Only rushing ships may pile up on the structure, the others deposit safely and keep mining
+        stacking = {ship.id for ship in ships if need_to_rush(ship)}
+        moves, free = traffic.resolve(structure, ships, intents, blocked, spawn=spawn and at_shipyard,
+                                      stacking=stacking)
+        if at_shipyard:
+            spawn_free = free
+
+        moving = [ship for ship in ships if ship.id in moves and moves[ship.id] != Direction.Still]
+        # Free every left cell before marking the new ones, ships of the window may follow each other
+        for ship in moving:
+            mark_safe(game_map[ship.position])
+        for ship in ships:
+            if ship.id not in moves:
+                continue
+            command_queue.append(ship.move(moves[ship.id]))
+            ships_play_order.remove(ship.id)
+            if moves[ship.id] != Direction.Still:
+                mark_moving(ship, moves[ship.id], intents[ship.id][1])
+            else:
+                mark_planned(ship, ship.position)
+    return spawn_free
 
 def make_decisions():
     ships = me.get_ships()
+    # Re-plan only ships which are new or whose mission is no longer valid
+    for ship in missions.update(me, is_mission_stale):
+        plan_mission(ship)
+
     # Queue for commands to be executed
     command_queue = []
     # Determine in which order, making decision for each ship
     ships_play_order = order_by_distance(ships)
+    # Whether a new ship pays for itself is decided first, so that the shipyard is kept free for it
+    spawn = resolve_structures_traffic(ships_play_order, command_queue, should_spawn())
 
     # Remove from ships_play_order when a ship can move
     ship_moving = True
@@ -247,9 +426,12 @@ def make_decisions():
             """ CONSTRUCTION """
 
             if me.halite_amount > constants.DROPOFF_COST and not game_map[ship.position].has_structure and \
-                grid_distance_to_dropoff(ship) > 15 and fleet_size() > 15 and game.turn_number < 350:
+                grid_distance_to_dropoff(ship) > params.dropoff_min_distance and \
+                fleet_size() > params.dropoff_min_fleet and game.turn_number < params.dropoff_last_turn and \
+                is_dropoff_worth(ship):
 
                 command_queue.append(ship.make_dropoff())
+                missions.assign(ship.id, Mode.BUILD_DROPOFF, ship.position, game.turn_number)
                 me.halite_amount -= constants.DROPOFF_COST
                 # free cell
                 ship_moving = True
@@ -268,10 +450,9 @@ def make_decisions():
                 # Update map cells info, if ship is moving
                 if direction != Direction.Still:
                     mark_safe(game_map[ship.position])
-                    target_pos = ship.position.directional_offset(direction)
-                    target_cell = game_map[target_pos]
-                    target_cell.mark_unsafe(ship)
-                    mark_reserved(destination)
+                    mark_moving(ship, direction, destination)
+                else:
+                    mark_planned(ship, ship.position)
                 break
 
     # Try to cross on remaining ships
@@ -292,6 +473,8 @@ def make_decisions():
             # Special update for cells, when crossing
             game_map[ship.position].mark_unsafe(crossing_ship)
             game_map[crossing_ship.position].mark_unsafe(ship)
+            mark_planned(crossing_ship, ship.position)
+            mark_planned(ship, crossing_ship.position)
 
             destination_crossing = find_destination(crossing_ship)
             mark_reserved(destination_crossing)
@@ -300,22 +483,31 @@ def make_decisions():
         else:
             ships_play_order.remove(ship.id)
 
-    return command_queue
+    # A dropoff may have been paid meanwhile, or a ship out of the shipyard window moved on it
+    spawn = spawn and me.halite_amount >= constants.SHIP_COST and not game_map[me.shipyard].is_occupied
+    return command_queue, spawn
 
 """ <<<Game Loop>>> """
 while True:
     # Shortands for functions
-    global me, game_map
+    global me, game_map, enemy_danger, turn_deadline
 
     start_time = time.time()
     game.update_frame()
+    # The budget starts once the frame is read, waiting for the other bots does not count
+    turn_deadline = time.time() + params.turn_time_budget
     me = game.me
     game_map = game.game_map
 
-    command_queue = make_decisions()
+    opponents.update(game)
+    enemy_danger = opponents.danger_map(game_map.width, game_map.height)
+
+    # Schedule the last returns as soon as some ship may have to leave
+    if constants.MAX_TURNS - game.turn_number <= game_map.width + fleet_size():
+        endgame.schedule(me.get_ships(), dropoff_positions(), game_map, game.turn_number, constants.MAX_TURNS)
 
-    # Keep creating ships while number of turns played is less than 200
-    if game.turn_number <= (constants.MAX_TURNS / 2) and me.halite_amount >= constants.SHIP_COST and not game_map[me.shipyard].is_occupied:
+    command_queue, spawn = make_decisions()
+    if spawn:
         command_queue.append(me.shipyard.spawn())
 
     logging.info("Time elapsed to make a decision this turn: {}".format(time.time() - start_time))
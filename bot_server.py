@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Python 3.6
+
+"""
+Long-running host of MyBot for local games.
+
+The server imports the hlt package, builds its tables for every map size and compiles the bot once,
+then forks a session for every connection on its Unix socket, so games start from a warm interpreter
+and can run concurrently. The game engine launches bot_shim.py, which connects its stdio to a session.
+
+Usage: python3 bot_server.py [--socket /tmp/halite-bot.sock] [--bot MyBot.py]
+       ./halite ... "python3 bot_shim.py" "python3 bot_shim.py --params candidate.json"
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+
+from hlt import warmup
+
+DEFAULT_SOCKET = "/tmp/halite-bot.sock"
+
+# Messages of the server itself, the root logger is left to the bots
+logger = logging.getLogger("bot_server")
+
+
+class ForkingUnixServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves every connection in a forked child of the warm server process.
+    """
+    def __init__(self, path, bot_path):
+        self.bot_path = os.path.abspath(bot_path)
+        with open(self.bot_path) as file:
+            self.bot_code = compile(file.read(), self.bot_path, "exec")
+        super().__init__(path, BotSession)
+
+
+class BotSession(socketserver.StreamRequestHandler):
+    """
+    A game played by the bot, its stdin and stdout being the connection to the shim.
+    """
+    def handle(self):
+        # The shim first sends the arguments of the bot on one line
+        argv = json.loads(self.rfile.readline().decode())
+        sys.argv = [self.server.bot_path] + argv
+        sys.stdin = io.TextIOWrapper(self.rfile, encoding="utf-8")
+        sys.stdout = io.TextIOWrapper(self.wfile, encoding="utf-8", line_buffering=True)
+        try:
+            exec(self.server.bot_code, {"__name__": "__main__", "__file__": self.server.bot_path})
+        except SystemExit:
+            # The bot exits when the engine closes its input
+            pass
+        finally:
+            sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host MyBot sessions in a warm process")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="path of the Unix socket to listen on")
+    parser.add_argument("--bot", default="MyBot.py", help="bot script to run in each session")
+    args = parser.parse_args()
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    # Bots write their logs in the working directory, as when launched by the engine
+    args.socket = os.path.abspath(args.socket)
+    os.chdir(os.path.dirname(os.path.abspath(args.bot)))
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    # Stop cleanly when killed, removing the socket
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    # Done before serving, so that sessions inherit them
+    warmup.import_all()
+    warmup.precompute()
+
+    with ForkingUnixServer(args.socket, args.bot) as server:
+        logger.info("Serving {} on {}".format(server.bot_path, args.socket))
+        try:
+            server.serve_forever()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
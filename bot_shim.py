@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# Python 3.6
+
+"""
+Connects the game engine's stdio to a session of bot_server.py.
+
+Only imports the standard library, so that it starts much faster than the bot itself.
+Arguments other than --socket are given to the bot, e.g. --params candidate.json.
+
+Usage: python3 bot_shim.py [--socket /tmp/halite-bot.sock] [bot arguments...]
+"""
+import json
+import os
+import socket
+import sys
+import threading
+
+DEFAULT_SOCKET = "/tmp/halite-bot.sock"
+
+
+def forward_input(connection):
+    """
+    Send everything the engine writes to the bot session, until the engine closes our stdin.
+    :param connection: The socket connected to the session
+    :return: nothing.
+    """
+    while True:
+        data = os.read(sys.stdin.fileno(), 65536)
+        if not data:
+            connection.shutdown(socket.SHUT_WR)
+            return
+        connection.sendall(data)
+
+
+def main():
+    argv = sys.argv[1:]
+    path = DEFAULT_SOCKET
+    if "--socket" in argv:
+        index = argv.index("--socket")
+        path = argv[index + 1]
+        del argv[index:index + 2]
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(path)
+    connection.sendall((json.dumps(argv) + "\n").encode())
+
+    threading.Thread(target=forward_input, args=(connection,), daemon=True).start()
+    while True:
+        data = connection.recv(65536)
+        if not data:
+            break
+        os.write(sys.stdout.fileno(), data)
+
+
+if __name__ == "__main__":
+    main()
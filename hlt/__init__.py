@@ -1,5 +1,5 @@
 #!/usr/bin/env python
 
-from . import commands, entity, game_map, networking, constants
+from . import commands, entity, game_map, missions, networking, constants
 from .networking import Game
 from .positionals import Direction, Position
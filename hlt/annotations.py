@@ -0,0 +1,94 @@
+class AnnotationLayer:
+    """
+    A value per cell of the map, valid for the current generation only.
+
+    Each cell stores the generation it was written at: cells written at an older generation read
+    as the default value, so clearing the layer is a counter bump instead of a walk over the map.
+    """
+    def __init__(self, width, height, default=None):
+        self.width = width
+        self.height = height
+        self.default = default
+        self.generation = 1
+        self._values = [default] * (width * height)
+        self._stamps = [0] * (width * height)
+
+    def _index(self, position):
+        return (position.y % self.height) * self.width + position.x % self.width
+
+    def get(self, position):
+        """
+        :param position: A position
+        :return: The value of the cell for the current generation, or the default
+        """
+        i = self._index(position)
+        return self._values[i] if self._stamps[i] == self.generation else self.default
+
+    def set(self, position, value=True):
+        """
+        Set the value of a cell for the current generation.
+        :param position: A position
+        :param value: The value to set
+        :return: nothing.
+        """
+        i = self._index(position)
+        self._values[i] = value
+        self._stamps[i] = self.generation
+
+    def unset(self, position):
+        """
+        Reset a cell to the default value.
+        :param position: A position
+        :return: nothing.
+        """
+        self._stamps[self._index(position)] = 0
+
+    def reset(self):
+        """
+        Reset every cell to the default value.
+        :return: nothing.
+        """
+        self.generation += 1
+
+
+class AnnotationLayers:
+    """
+    The annotation layers of a map: reserved, defended and planned occupancy, plus any layer added by the bot.
+
+    Layers are accessed as attributes, e.g. game_map.layers.reserved.set(position).
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._layers = {}
+        # Cells targeted by a ship this turn
+        self.add("reserved", False)
+        # Dropoffs a ship has already been sent to defend this turn
+        self.add("defended", False)
+        # Id of the ship planned to be on the cell next turn
+        self.add("planned", None)
+
+    def add(self, name, default=None):
+        """
+        Create a new layer, or return the existing one with this name.
+        :param name: The name of the layer
+        :param default: The value of the cells not set in the current generation
+        :return: The layer
+        """
+        if name not in self._layers:
+            self._layers[name] = AnnotationLayer(self.width, self.height, default)
+        return self._layers[name]
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["_layers"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def reset(self):
+        """
+        Reset every layer, called at the start of each turn.
+        :return: nothing.
+        """
+        for layer in self._layers.values():
+            layer.reset()
@@ -1,3 +1,6 @@
+import logging
+
+
 # Placed here to avoid circular imports
 def read_input():
     """
@@ -0,0 +1,104 @@
+import math
+
+
+class Departure:
+    """
+    When and where a ship has to go back for the end of the game.
+    """
+    def __init__(self, ship_id, dropoff, arrival_turn, turn):
+        self.ship_id = ship_id
+        self.dropoff = dropoff
+        self.arrival_turn = arrival_turn
+        self.turn = turn
+
+    def __repr__(self):
+        return "{}(ship={}, to {}, leave turn {}, arrive turn {})".format(self.__class__.__name__,
+                                                                        self.ship_id,
+                                                                        self.dropoff,
+                                                                        self.turn,
+                                                                        self.arrival_turn)
+
+
+class EndgameScheduler:
+    """
+    Plans the last return of every ship, considering that a dropoff can only take a few arrivals per turn.
+
+    Each dropoff has `throughput` arrival slots per turn (one per neighbor cell). Slots are given from the
+    last turn backward, so that ships leave as late as possible, each ship taking the dropoff where it
+    can leave the latest. Farthest ships are served first since they have the fewest slots reachable in time.
+    """
+    def __init__(self, throughput=4, margin=2):
+        """
+        :param throughput: The number of ships a dropoff can take per turn
+        :param margin: Turns added to each trip, considering the ship may be blocked on its way back
+        """
+        self.throughput = throughput
+        self.margin = margin
+        self._departures = {}
+        self._departed = set()
+
+    def schedule(self, ships, dropoffs, game_map, turn, last_turn):
+        """
+        Compute the departure of every ship.
+        :param ships: The ships to bring back
+        :param dropoffs: The positions of the dropoffs, including the shipyard
+        :param game_map: The game map, to compute distances
+        :param turn: The current turn
+        :param last_turn: The last turn a ship can deposit its halite
+        :return: A dict ship id -> Departure
+        """
+        distances = [[game_map.calculate_distance(ship.position, dropoff) for dropoff in dropoffs]
+                     for ship in ships]
+        order = sorted(range(len(ships)), key=lambda i: min(distances[i]), reverse=True)
+
+        # Latest free arrival turn of each dropoff and the slots left on that turn
+        slot_turn = [last_turn] * len(dropoffs)
+        slot_left = [self.throughput] * len(dropoffs)
+
+        previous, self._departures = self._departures, {}
+        for i in order:
+            ship = ships[i]
+            candidates = range(len(dropoffs))
+            if ship.id in self._departed and ship.id in previous and previous[ship.id].dropoff in dropoffs:
+                # Ships on their way back keep their dropoff
+                candidates = [dropoffs.index(previous[ship.id].dropoff)]
+
+            best, best_departure = None, -math.inf
+            for k in candidates:
+                departure = slot_turn[k] - distances[i][k] - self.margin
+                if departure > best_departure or (departure == best_departure and
+                                                  distances[i][k] < distances[i][best]):
+                    best, best_departure = k, departure
+
+            arrival = slot_turn[best]
+            slot_left[best] -= 1
+            if slot_left[best] == 0:
+                slot_turn[best] -= 1
+                slot_left[best] = self.throughput
+
+            # A ship which cannot make it in time leaves right away
+            self._departures[ship.id] = Departure(ship.id, dropoffs[best], arrival, max(turn, best_departure))
+        return self._departures
+
+    def get(self, ship_id):
+        """
+        :param ship_id: The id of the ship
+        :return: The Departure of the ship in the last schedule, or None
+        """
+        return self._departures.get(ship_id)
+
+    def is_due(self, ship_id, turn):
+        """
+        Check whether a ship has to be on its way back. Once a ship left, it keeps going back
+        even if a later schedule would let it leave later.
+        :param ship_id: The id of the ship
+        :param turn: The current turn
+        :return: True if the ship has to go back to its dropoff
+        """
+        if ship_id in self._departed:
+            return True
+        departure = self._departures.get(ship_id)
+        if departure is not None and turn >= departure.turn:
+            self._departed.add(ship_id)
+            return True
+        return False
@@ -1,7 +1,11 @@
 import queue
 
 from . import constants
+from .annotations import AnnotationLayers
 from .entity import Entity, Shipyard, Ship, Dropoff
+from .halite_index import HaliteIndex
+from .interest import InterestMap
+from .ship_index import ShipIndex
 from .positionals import Direction, Position
 from .common import read_input
 
@@ -145,6 +149,11 @@ class GameMap:
         self.width = width
         self.height = height
         self._cells = cells
+        self.halite_index = HaliteIndex(cells, width, height)
+        self.interest = InterestMap(cells, width, height)
+        self.ship_index = ShipIndex(width, height)
+        self.updated_positions = []
+        self.layers = AnnotationLayers(width, height)
 
     def __getitem__(self, location):
         """
@@ -262,7 +271,14 @@ class GameMap:
         for y in range(self.height):
             for x in range(self.width):
                 self[Position(x, y)].ship = None
+        # Annotations of the previous turn are outdated
+        self.layers.reset()
 
+        self.updated_positions = []
         for _ in range(int(read_input())):
             cell_x, cell_y, cell_energy = map(int, read_input().split())
-            self[Position(cell_x, cell_y)].halite_amount = cell_energy
+            position = Position(cell_x, cell_y)
+            self[position].halite_amount = cell_energy
+            self.halite_index.update(position, cell_energy)
+            self.updated_positions.append(position)
+        self.interest.update([(position, self[position].halite_amount) for position in self.updated_positions])
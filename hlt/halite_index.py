@@ -0,0 +1,135 @@
+import heapq
+
+from .positionals import Position
+
+
+class HaliteIndex:
+    """
+    Max-pyramid over the halite of every cell, to answer best targets queries without scanning the map.
+
+    Level 0 holds the halite of each cell, each next level holds the max of 2x2 blocks of the level below.
+    The map is padded to a power of two with empty blocks. Updating a cell only walks up its ancestors,
+    so the index is kept up to date from the cells sent by the engine each turn.
+    """
+    _EMPTY = -1
+
+    def __init__(self, cells, width, height):
+        self.width = width
+        self.height = height
+        size = 1
+        while size < max(width, height):
+            size *= 2
+        self._size = size
+
+        base = [self._EMPTY] * (size * size)
+        for y in range(height):
+            for x in range(width):
+                base[y * size + x] = cells[y][x].halite_amount
+        # Halite left on the whole map
+        self.total_halite = sum(value for value in base if value != self._EMPTY)
+        self._levels = [base]
+        while size > 1:
+            below = self._levels[-1]
+            size //= 2
+            level = [self._EMPTY] * (size * size)
+            for y in range(size):
+                for x in range(size):
+                    i = 2 * y * 2 * size + 2 * x
+                    level[y * size + x] = max(below[i], below[i + 1],
+                                              below[i + 2 * size], below[i + 2 * size + 1])
+            self._levels.append(level)
+
+    def __getitem__(self, position):
+        """
+        :param position: A normalized position
+        :return: The halite amount indexed for this cell
+        """
+        return self._levels[0][position.y * self._size + position.x]
+
+    def update(self, position, halite_amount):
+        """
+        Set the halite of a cell and refresh the max of the blocks containing it.
+        :param position: A normalized position
+        :param halite_amount: The new halite amount of the cell
+        :return: nothing.
+        """
+        x, y = position.x, position.y
+        size = self._size
+        self.total_halite += halite_amount - self._levels[0][y * size + x]
+        self._levels[0][y * size + x] = halite_amount
+        for level in range(1, len(self._levels)):
+            below = self._levels[level - 1]
+            x, y = x // 2, y // 2
+            i = 2 * y * size + 2 * x
+            value = max(below[i], below[i + 1], below[i + size], below[i + size + 1])
+            size //= 2
+            if self._levels[level][y * size + x] == value:
+                break
+            self._levels[level][y * size + x] = value
+
+    @staticmethod
+    def _axis_distance(p, low, high, length):
+        # Toroidal distance between a coordinate and the range [low, high)
+        if low <= p < high:
+            return 0
+        return min((low - p) % length, (p - high + 1) % length)
+
+    def _block_distance(self, source, level, bx, by):
+        side = 1 << level
+        x0, y0 = bx * side, by * side
+        return self._axis_distance(source.x, x0, min(x0 + side, self.width), self.width) + \
+            self._axis_distance(source.y, y0, min(y0 + side, self.height), self.height)
+
+    def _search(self, source, k, radius, min_halite, accept, score):
+        """
+        Best-first search over the pyramid, a block bound being score(block max, distance to block).
+        """
+        top = len(self._levels) - 1
+        heap = [(-score(self._levels[top][0], 0), top, 0, 0)]
+        results = []
+        while heap and len(results) < k:
+            _, level, bx, by = heapq.heappop(heap)
+            if level == 0:
+                position = Position(bx, by)
+                if accept is None or accept(position):
+                    results.append(position)
+                continue
+
+            level -= 1
+            size = self._size >> level
+            values = self._levels[level]
+            for cy in (2 * by, 2 * by + 1):
+                for cx in (2 * bx, 2 * bx + 1):
+                    value = values[cy * size + cx]
+                    if value < min_halite or value == self._EMPTY:
+                        continue
+                    distance = self._block_distance(source, level, cx, cy)
+                    if radius is not None and distance > radius:
+                        continue
+                    heapq.heappush(heap, (-score(value, distance), level, cx, cy))
+        return results
+
+    def best_cells(self, source, radius, k=1, min_halite=0, accept=None):
+        """
+        Returns the richest cells within a Manhattan radius, accounting for wrap-around.
+        :param source: The normalized position to search around
+        :param radius: The maximum distance of the cells
+        :param k: The maximum number of cells to return
+        :param min_halite: Cells with less halite are ignored
+        :param accept: Optional function position -> bool to skip cells, e.g. reserved ones
+        :return: A list of positions by descending halite
+        """
+        return self._search(source, k, radius, min_halite, accept, lambda value, distance: value)
+
+    def best_by_distance(self, source, k=1, radius=None, min_halite=0, accept=None):
+        """
+        Returns the cells with the best halite per turn spent to reach and mine them, i.e. halite / (distance + 1).
+        :param source: The normalized position to search around
+        :param k: The maximum number of cells to return
+        :param radius: Optional maximum distance of the cells
+        :param min_halite: Cells with less halite are ignored
+        :param accept: Optional function position -> bool to skip cells, e.g. reserved ones
+        :return: A list of positions by descending score
+        """
+        return self._search(source, k, radius, min_halite, accept,
+                            lambda value, distance: value / (distance + 1))
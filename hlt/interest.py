@@ -0,0 +1,135 @@
+import numpy as np
+
+from .positionals import Position
+
+# Radius of the neighborhoods of the interest map of a game
+DEFAULT_RADIUS = 5
+
+# Diamond offsets and kernel FFT, by (width, height, radius), shared by every map of this size
+_KERNELS = {}
+
+
+def diamond_kernel(width, height, radius):
+    """
+    :param width: The width of the map
+    :param height: The height of the map
+    :param radius: The Manhattan radius of the diamond
+    :return: A tuple (dy offsets, dx offsets, FFT of the diamond kernel), computed once per map size.
+    The arrays are shared and must not be modified.
+    """
+    key = (width, height, radius)
+    if key not in _KERNELS:
+        # Offsets of the diamond, without duplicates when it wraps around a small map
+        offsets = {((dy % height), (dx % width))
+                   for dy in range(-radius, radius + 1)
+                   for dx in range(-(radius - abs(dy)), radius - abs(dy) + 1)}
+        dys = np.array([dy for dy, _ in offsets], dtype=np.int64)
+        dxs = np.array([dx for _, dx in offsets], dtype=np.int64)
+        kernel = np.zeros((height, width))
+        kernel[dys, dxs] = 1
+        _KERNELS[key] = (dys, dxs, np.fft.rfft2(kernel))
+    return _KERNELS[key]
+
+
+class InterestMap:
+    """
+    Halite within a Manhattan radius of every cell, i.e. how rich the neighborhood of a cell is.
+
+    The whole map is computed as a convolution of the halite array with a diamond kernel, done with FFTs
+    so that it wraps around the torus. Cells sent by the engine each turn then only add their change
+    to the diamond around them, the map being recomputed when too many cells changed.
+    """
+    def __init__(self, cells, width, height, radius=DEFAULT_RADIUS):
+        """
+        :param cells: The cells of the map, indexed [y][x]
+        :param width: The width of the map
+        :param height: The height of the map
+        :param radius: The Manhattan radius of the neighborhoods
+        """
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.halite = np.array([[cell.halite_amount for cell in row] for row in cells], dtype=np.int64)
+
+        self._dy, self._dx, self._kernel = diamond_kernel(width, height, radius)
+        # Number of cells in a neighborhood
+        self.cells = len(self._dy)
+        self.density = self._convolve()
+
+    def _convolve(self):
+        # The diamond is symmetric, so the convolution sums the halite around each cell
+        total = np.fft.irfft2(np.fft.rfft2(self.halite) * self._kernel, s=self.halite.shape)
+        return np.rint(total).astype(np.int64)
+
+    def __getitem__(self, position):
+        """
+        :param position: A normalized position
+        :return: The halite within the radius of this cell
+        """
+        return int(self.density[position.y, position.x])
+
+    def update(self, changes):
+        """
+        Apply the halite changes of a turn.
+        :param changes: A list of (position, new halite amount)
+        :return: nothing.
+        """
+        # The last amount of a cell wins, each cell must be counted once in the deltas
+        latest = {(position.y, position.x): amount for position, amount in changes}
+        if not latest:
+            return
+        ys = np.array([y for y, _ in latest], dtype=np.int64)
+        xs = np.array([x for _, x in latest], dtype=np.int64)
+        amounts = np.array(list(latest.values()), dtype=np.int64)
+        deltas = amounts - self.halite[ys, xs]
+        self.halite[ys, xs] = amounts
+
+        if len(latest) * self.cells > self.width * self.height:
+            # Cheaper to recompute the whole map
+            self.density = self._convolve()
+            return
+        # Changes of cells close to each other add on the same neighborhoods
+        np.add.at(self.density,
+                  ((ys[:, None] + self._dy) % self.height, (xs[:, None] + self._dx) % self.width),
+                  deltas[:, None])
+
+    def local_max(self, position, radius):
+        """
+        :param position: A normalized position
+        :param radius: The Manhattan radius to look around the position
+        :return: The richest neighborhood among the cells within the radius of the position
+        """
+        best = 0
+        for dy in range(-radius, radius + 1):
+            span = radius - abs(dy)
+            row = self.density[(position.y + dy) % self.height]
+            best = max(best, int(row[np.arange(position.x - span, position.x + span + 1) % self.width].max()))
+        return best
+
+    def distances(self, source):
+        """
+        :param source: A normalized position
+        :return: An array [y, x] of the toroidal Manhattan distances of every cell to the source
+        """
+        dx = np.abs(np.arange(self.width) - source.x)
+        dy = np.abs(np.arange(self.height) - source.y)
+        return np.minimum(dy, self.height - dy)[:, None] + np.minimum(dx, self.width - dx)[None, :]
+
+    def best_by_distance(self, source, k=1, accept=None):
+        """
+        Returns the centers of the richest neighborhoods for the turns needed to reach them,
+        i.e. halite around / (distance + 1).
+        :param source: The normalized position to search around
+        :param k: The maximum number of positions to return
+        :param accept: Optional function position -> bool to skip cells, e.g. close to a dropoff
+        :return: A list of positions by descending score
+        """
+        scores = (self.density / (self.distances(source) + 1)).ravel()
+        results = []
+        for index in np.argsort(-scores, kind="stable"):
+            position = Position(int(index % self.width), int(index // self.width))
+            if accept is None or accept(position):
+                results.append(position)
+                if len(results) == k:
+                    break
+        return results
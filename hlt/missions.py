@@ -0,0 +1,117 @@
+from .positionals import Position
+
+
+class Mode:
+    """
+    Holds the kinds of mission a ship can be assigned to
+    """
+    EXPLORE = "explore"
+    MINE = "mine"
+    RETURN = "return"
+    BUILD_DROPOFF = "build_dropoff"
+    DEFEND = "defend"
+
+
+class Mission:
+    """
+    A goal given to a ship, kept across turns until it has to be re-planned.
+    """
+    def __init__(self, ship_id, mode, target, turn):
+        self.ship_id = ship_id
+        self.mode = mode
+        self.target = target
+        self.assigned_turn = turn
+
+    def __repr__(self):
+        return "{}(ship={}, {}, {}, since turn {})".format(self.__class__.__name__,
+                                                          self.ship_id,
+                                                          self.mode,
+                                                          self.target,
+                                                          self.assigned_turn)
+
+
+class MissionPlanner:
+    """
+    Keeps one mission per ship id across turns.
+
+    Ship objects are rebuilt by the engine every turn, so missions are keyed by ship id.
+    Only ships that are new or whose mission has been invalidated need to be planned again.
+    """
+    def __init__(self):
+        self._missions = {}
+        self._targets = {}
+
+    def get(self, ship_id):
+        """
+        :param ship_id: The id of the ship
+        :return: The mission of the ship, or None if it has none
+        """
+        return self._missions.get(ship_id)
+
+    def get_missions(self):
+        """
+        :return: Returns all missions in a list
+        """
+        return list(self._missions.values())
+
+    def assign(self, ship_id, mode, target, turn):
+        """
+        Give a new mission to a ship, replacing its previous one.
+        :param ship_id: The id of the ship
+        :param mode: The Mode of the mission
+        :param target: The position the ship has to reach
+        :param turn: The turn the mission is assigned
+        :return: The new mission
+        """
+        self.discard(ship_id)
+        mission = Mission(ship_id, mode, Position(target.x, target.y), turn)
+        self._missions[ship_id] = mission
+        self._targets.setdefault((target.x, target.y), set()).add(ship_id)
+        return mission
+
+    def discard(self, ship_id):
+        """
+        Remove the mission of a ship, if any.
+        :param ship_id: The id of the ship
+        :return: nothing.
+        """
+        mission = self._missions.pop(ship_id, None)
+        if mission is None:
+            return
+        key = (mission.target.x, mission.target.y)
+        owners = self._targets.get(key)
+        if owners is not None:
+            owners.discard(ship_id)
+            if not owners:
+                del self._targets[key]
+
+    def is_targeted(self, position, ship_id=None):
+        """
+        Check whether a position is the target of a mission of another ship.
+        :param position: The normalized position to check
+        :param ship_id: The ship asking, its own mission is ignored
+        :return: True if another ship is heading to this position
+        """
+        owners = self._targets.get((position.x, position.y))
+        if not owners:
+            return False
+        return len(owners) > 1 or ship_id not in owners
+
+    def update(self, player, is_stale):
+        """
+        Forget missions of lost ships and collect the ships which need a new mission.
+        :param player: The player owning the missions
+        :param is_stale: A function (mission, ship) -> bool telling whether a mission has to be re-planned
+        :return: The list of ships to plan this turn
+        """
+        for ship_id in list(self._missions):
+            if not player.has_ship(ship_id):
+                self.discard(ship_id)
+
+        to_plan = []
+        for ship in player.get_ships():
+            mission = self._missions.get(ship.id)
+            if mission is None or is_stale(mission, ship):
+                self.discard(ship.id)
+                to_plan.append(ship)
+        return to_plan
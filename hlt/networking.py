@@ -5,6 +5,7 @@ import sys
 from .common import read_input
 from . import constants
 from .game_map import GameMap, Player
+from .snapshots import SnapshotWriter
 
 
 class Game:
@@ -35,6 +36,7 @@ class Game:
             self.players[player] = Player._generate()
         self.me = self.players[self.my_id]
         self.game_map = GameMap._generate()
+        self._snapshots = None
 
     def ready(self, name):
         """
@@ -43,6 +45,13 @@ class Game:
         """
         send_commands([name])
 
+    def record_snapshots(self, base_path):
+        """
+        Record the state of every turn and the commands sent in binary snapshot files.
+        :param base_path: The path of the snapshot files, without extension
+        """
+        self._snapshots = SnapshotWriter(base_path, self)
+
     def update_frame(self):
         """
         Updates the game object's state.
@@ -56,6 +65,7 @@ class Game:
             self.players[player]._update(num_ships, num_dropoffs, halite)
 
         self.game_map._update()
+        self.game_map.ship_index.rebuild(self.players.values())
 
         # Mark cells with ships as unsafe for navigation
         for player in self.players.values():
@@ -66,14 +76,18 @@ class Game:
             for dropoff in player.get_dropoffs():
                 self.game_map[dropoff.position].structure = dropoff
 
-    @staticmethod
-    def end_turn(commands):
+        if self._snapshots is not None:
+            self._snapshots.write_frame(self)
+
+    def end_turn(self, commands):
         """
         Method to send all commands to the game engine, effectively ending your turn.
         :param commands: Array of commands to send to engine
         :return: nothing.
         """
         send_commands(commands)
+        if self._snapshots is not None:
+            self._snapshots.write_commands(self.turn_number, commands)
 
 
 def send_commands(commands):
@@ -0,0 +1,182 @@
+from collections import deque
+
+import numpy as np
+
+from . import constants
+from .positionals import Direction
+
+
+class Behavior:
+    """
+    Holds what an opponent ship is inferred to be doing
+    """
+    EXPLORING = 0
+    MINING = 1
+    RETURNING = 2
+    RAMMING = 3
+
+
+class OpponentTracker:
+    """
+    Keeps the recent trajectory of every opponent ship and predicts their next move.
+
+    Ship objects are rebuilt every turn, so trajectories are kept in ring buffers keyed by ship id.
+    Predictions are computed for all the opponent ships at once with NumPy arrays.
+    """
+    # Order of the moves in the predicted distributions
+    MOVES = [Direction.Still, Direction.North, Direction.South, Direction.East, Direction.West]
+
+    def __init__(self, my_id, history=8):
+        """
+        :param my_id: Our player id, our ships are not tracked
+        :param history: The number of turns kept for each ship
+        """
+        self.my_id = my_id
+        self.history = history
+        self._tracks = {}
+        self.ship_ids = np.zeros(0, dtype=int)
+        self.behaviors = np.zeros(0, dtype=int)
+        self._targets = np.zeros((0, len(self.MOVES), 2), dtype=int)
+        self._probabilities = np.zeros((0, len(self.MOVES)))
+
+    def get_track(self, ship_id):
+        """
+        :param ship_id: The id of an opponent ship
+        :return: The list of (turn, x, y, halite) of the ship, oldest first
+        """
+        return list(self._tracks.get(ship_id, ()))
+
+    def update(self, game):
+        """
+        Record the opponent ships of this turn, infer their behavior and predict their moves.
+        :param game: The game object, after update_frame
+        :return: nothing.
+        """
+        game_map = game.game_map
+        width, height = game_map.width, game_map.height
+
+        ships, owners = [], []
+        for player in game.players.values():
+            if player.id == self.my_id:
+                continue
+            for ship in player.get_ships():
+                ships.append(ship)
+                owners.append(player.id)
+
+        alive = set()
+        for ship in ships:
+            alive.add(ship.id)
+            track = self._tracks.get(ship.id)
+            if track is None:
+                track = self._tracks[ship.id] = deque(maxlen=self.history)
+            track.append((game.turn_number, ship.position.x, ship.position.y, ship.halite_amount))
+        for ship_id in list(self._tracks):
+            if ship_id not in alive:
+                del self._tracks[ship_id]
+
+        count = len(ships)
+        self.ship_ids = np.array([ship.id for ship in ships], dtype=int)
+        if count == 0:
+            self.behaviors = np.zeros(0, dtype=int)
+            self._targets = np.zeros((0, len(self.MOVES), 2), dtype=int)
+            self._probabilities = np.zeros((0, len(self.MOVES)))
+            return
+
+        # Last two states of each ship, a new ship is considered still
+        current = np.array([self._tracks[ship.id][-1][1:] for ship in ships], dtype=int)
+        previous = np.array([self._tracks[ship.id][-min(2, len(self._tracks[ship.id]))][1:] for ship in ships],
+                            dtype=int)
+        cell_halite = np.array([game_map[ship.position].halite_amount for ship in ships])
+
+        offsets = np.array(self.MOVES, dtype=int)
+        targets = current[:, None, :2] + offsets[None, :, :]
+        targets[..., 0] %= width
+        targets[..., 1] %= height
+
+        last_move = current[:, :2] - previous[:, :2]
+        last_move[:, 0] = (last_move[:, 0] + width // 2) % width - width // 2
+        last_move[:, 1] = (last_move[:, 1] + height // 2) % height - height // 2
+        moved = np.any(last_move != 0, axis=1)
+        cargo, cargo_delta = current[:, 2], current[:, 2] - previous[:, 2]
+
+        # Distance after each move to the closest dropoff of the owner, and before the last move
+        owners = np.array(owners)
+        dropoff_distance = np.full((count, len(self.MOVES)), width + height)
+        previous_distance = np.full(count, width + height)
+        for player in game.players.values():
+            owned = owners == player.id
+            if player.id == self.my_id or not owned.any():
+                continue
+            dropoffs = np.array([[player.shipyard.position.x, player.shipyard.position.y]] +
+                                [[drop.position.x, drop.position.y] for drop in player.get_dropoffs()])
+            dropoff_distance[owned] = self._distances(targets[owned], dropoffs, width, height).min(axis=2)
+            previous_distance[owned] = self._distances(previous[owned, :2], dropoffs, width, height).min(axis=1)
+
+        # Distance after each move to the closest of our ships
+        mine = np.array([[ship.position.x, ship.position.y] for ship in game.players[self.my_id].get_ships()])
+        if len(mine):
+            prey_distance = self._distances(targets, mine, width, height).min(axis=2)
+        else:
+            prey_distance = np.full((count, len(self.MOVES)), width + height)
+
+        returning = (cargo > constants.MAX_HALITE * 0.7) | \
+            (moved & (cargo > constants.MAX_HALITE * 0.3) & (dropoff_distance[:, 0] < previous_distance))
+        mining = ~moved & (cargo_delta > 0)
+        ramming = (cargo < constants.MAX_HALITE * 0.1) & (prey_distance[:, 0] <= 2) & moved
+        behaviors = np.full(count, Behavior.EXPLORING)
+        behaviors[ramming] = Behavior.RAMMING
+        behaviors[mining] = Behavior.MINING
+        behaviors[returning] = Behavior.RETURNING
+
+        # Weights of each move by behavior
+        weights = np.full((count, len(self.MOVES)), 1.0)
+        weights[:, 0] = 2.0
+        repeat = np.all(offsets[None, :, :] == last_move[:, None, :], axis=2) & moved[:, None]
+        weights[repeat] += 4.0
+
+        is_mining = behaviors == Behavior.MINING
+        weights[is_mining, 0] += 16.0
+
+        closer_to_dropoff = dropoff_distance < dropoff_distance[:, :1]
+        weights[behaviors == Behavior.RETURNING] += 8.0 * closer_to_dropoff[behaviors == Behavior.RETURNING]
+
+        closer_to_prey = prey_distance < prey_distance[:, :1]
+        weights[behaviors == Behavior.RAMMING] += 8.0 * closer_to_prey[behaviors == Behavior.RAMMING]
+
+        # A ship without enough halite to pay the move has to stay still
+        stuck = cargo < cell_halite // constants.MOVE_COST_RATIO
+        weights[stuck, 1:] = 0.0
+
+        self.behaviors = behaviors
+        self._targets = targets
+        self._probabilities = weights / weights.sum(axis=1, keepdims=True)
+
+    @staticmethod
+    def _distances(sources, targets, width, height):
+        """
+        :param sources: An array (..., 2) of positions
+        :param targets: An array (T, 2) of positions
+        :return: The array (..., T) of the toroidal Manhattan distances
+        """
+        delta = np.abs(sources[..., None, :] - targets)
+        delta[..., 0] = np.minimum(delta[..., 0], width - delta[..., 0])
+        delta[..., 1] = np.minimum(delta[..., 1], height - delta[..., 1])
+        return delta.sum(axis=-1)
+
+    def predict(self):
+        """
+        :return: A tuple (ship ids (N,), target positions (N, 5, 2) as x, y, probabilities (N, 5)),
+                 the moves being in the order of OpponentTracker.MOVES
+        """
+        return self.ship_ids, self._targets, self._probabilities
+
+    def danger_map(self, width, height):
+        """
+        :param width: The width of the map
+        :param height: The height of the map
+        :return: An array (height, width) of the expected number of opponent ships on each cell next turn
+        """
+        danger = np.zeros((height, width))
+        np.add.at(danger, (self._targets[..., 1].ravel(), self._targets[..., 0].ravel()),
+                  self._probabilities.ravel())
+        return danger
@@ -0,0 +1,95 @@
+import json
+
+
+class Parameters:
+    """
+    Tunable constants of the bot heuristics.
+
+    Defaults are the hand-tuned values, any of them can be overridden from a JSON file,
+    e.g. by the self-play tuner.
+    """
+    DEFAULTS = {
+        # Ratio of MAX_HALITE above which a cell is worth mining
+        "interesting_treshold": 5 / 100,
+        # Number of best cells by halite per distance among which explore targets are chosen by neighborhood
+        "target_candidates": 4,
+        # Ratio of MAX_HALITE of cargo to go back to a dropoff, whatever is under the ship
+        "return_full_ratio": 95 / 100,
+        # Ratio of MAX_HALITE of cargo to go back to a dropoff once the cell under the ship is mined
+        "return_ratio": 85 / 100,
+        # Turns added to the distance to a dropoff, considering the ship may be blocked on its way back
+        "rush_margin": 7,
+        # Turns added to the end-game return of each ship, on top of the wait at its dropoff
+        "endgame_margin": 2,
+        # Expected number of opponent ships on a cell next turn above which our ships avoid it
+        "enemy_risk_treshold": 1 / 2,
+        # Minimum grid distance from a dropoff to build a new one
+        "dropoff_min_distance": 15,
+        # Minimum fleet size to build a dropoff
+        "dropoff_min_fleet": 15,
+        # No dropoff is built from this turn
+        "dropoff_last_turn": 350,
+        # A dropoff is only built on the richest neighborhood within this distance of the ship
+        "dropoff_site_radius": 2,
+        # Ratio of the richest neighborhood within dropoff_site_radius a site must hold
+        "dropoff_site_ratio": 9 / 10,
+        # Ratio of MAX_TURNS until which ships are spawned, up to min_fleet or when there is no time left for rollouts
+        "spawn_turns_ratio": 1 / 2,
+        # Ships always spawned during the first part of the game, see spawn_turns_ratio
+        "min_fleet": 5,
+        # Percentile of the cells halite used as the halite of the cells ships move on, in rollouts
+        "path_halite_percentile": 10,
+        # Seconds of a turn after which rollouts stop
+        "turn_time_budget": 1 / 4,
+        # Seconds given to the rollouts of a dropoff decision
+        "dropoff_time_slice": 1 / 20,
+        # Turns a dropoff would be delayed when evaluating to build it later
+        "dropoff_delay": 20,
+    }
+
+    def __init__(self, **values):
+        unknown = set(values) - set(self.DEFAULTS)
+        if unknown:
+            raise KeyError("Unknown parameters: {}".format(", ".join(sorted(unknown))))
+        for name, default in self.DEFAULTS.items():
+            setattr(self, name, type(default)(values.get(name, default)))
+
+    def to_dict(self):
+        """
+        :return: The parameters as a dict
+        """
+        return {name: getattr(self, name) for name in self.DEFAULTS}
+
+    def save(self, path):
+        """
+        Write the parameters to a JSON file.
+        :param path: The path of the file
+        :return: nothing.
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2, sort_keys=True)
+
+    @staticmethod
+    def load(path):
+        """
+        Read parameters from a JSON file, missing ones keep their default.
+        :param path: The path of the file
+        :return: The parameters object
+        """
+        with open(path) as file:
+            return Parameters(**json.load(file))
+
+    @staticmethod
+    def from_args(argv):
+        """
+        Read parameters from the file given with --params on the command line, or use the defaults.
+        :param argv: The command line arguments
+        :return: The parameters object
+        """
+        if "--params" in argv:
+            return Parameters.load(argv[argv.index("--params") + 1])
+        return Parameters()
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__,
+                               ", ".join("{}={}".format(name, value) for name, value in self.to_dict().items()))
@@ -0,0 +1,187 @@
+import time
+
+import numpy as np
+
+from . import constants
+
+
+class EconomyState:
+    """
+    Summary of our mining economy, the starting point of rollouts.
+    """
+    def __init__(self, remaining_turns, ships, bank, map_halite, cells, opponent_ships, trip_distance,
+                 path_halite):
+        """
+        :param remaining_turns: The number of turns left in the game
+        :param ships: The number of ships of our fleet
+        :param bank: Our halite amount
+        :param map_halite: The halite left on the map
+        :param cells: The number of cells of the map
+        :param opponent_ships: The number of ships of all opponents, mining the same map
+        :param trip_distance: The average distance between our mining spots and dropoffs
+        :param path_halite: The halite of the cells ships move on during their trips, e.g. a low percentile
+        of the cells, as ships go through depleted cells rather than rich ones
+        """
+        self.remaining_turns = remaining_turns
+        self.ships = ships
+        self.bank = bank
+        self.map_halite = map_halite
+        self.cells = cells
+        self.opponent_ships = opponent_ships
+        self.trip_distance = trip_distance
+        self.path_halite = path_halite
+
+
+class Option:
+    """
+    A decision to evaluate: spawn a ship now and/or build a dropoff after some turns.
+    """
+    def __init__(self, spawn=False, dropoff_in=None, dropoff_share=0.0, dropoff_trip=0.0,
+                 dropoff_halite=0.0, dropoff_cells=1, dropoff_map_trip=None):
+        """
+        :param spawn: Whether a ship is spawned now
+        :param dropoff_in: Turns until a dropoff is built, None if it is not built
+        :param dropoff_share: The share of the fleet which would deliver to the new dropoff
+        :param dropoff_trip: The average trip distance of these ships to the new dropoff, mining around it
+        :param dropoff_halite: The halite around the new dropoff
+        :param dropoff_cells: The number of cells around the new dropoff holding dropoff_halite
+        :param dropoff_map_trip: The average trip distance of these ships to the new dropoff once they mine
+        the rest of the map again, None for the trip distance of the state
+        """
+        self.spawn = spawn
+        self.dropoff_in = dropoff_in
+        self.dropoff_share = dropoff_share
+        self.dropoff_trip = dropoff_trip
+        self.dropoff_halite = dropoff_halite
+        self.dropoff_cells = dropoff_cells
+        self.dropoff_map_trip = dropoff_map_trip
+
+
+class RolloutEngine:
+    """
+    Evaluates options with many short rollouts of a forward model of our fleet, run as NumPy batches.
+
+    Each ship cycles between mining until its cargo is almost full and a round trip to a dropoff.
+    The map halite is shared with opponent ships, so mining gets slower as the map is depleted.
+    Rollouts differ by random mining efficiency and trip lengths, the same draws being used for every option.
+    """
+    def __init__(self, batch_size=128, seed=None, return_ratio=0.9, separation=4):
+        """
+        :param batch_size: The number of rollouts run at once for each option
+        :param seed: The seed of the random generator
+        :param return_ratio: Ratio of MAX_HALITE of cargo ships bring back
+        :param separation: Rollouts stop once the best option leads every other by this many standard errors
+        """
+        self.batch_size = batch_size
+        self.return_ratio = return_ratio
+        self.separation = separation
+        self._rng = np.random.RandomState(seed)
+
+    @staticmethod
+    def _delivery_rate(density, path_density, round_trip, efficiency, cargo):
+        """
+        :param density: The halite of the cells mined
+        :param path_density: The halite of the cells moved on, which sets the cost of the trips
+        :return: The halite delivered per ship and per turn, a cargo every mining + round trip cycle
+        """
+        gain = np.maximum(density * efficiency / constants.EXTRACT_RATIO, 1.0)
+        move_cost = round_trip * path_density / constants.MOVE_COST_RATIO
+        return np.maximum(cargo - move_cost, 0.0) / (cargo / gain + round_trip)
+
+    def _simulate(self, state, option, efficiency, trip_noise):
+        """
+        Run one batch of rollouts of an option.
+        :return: An array of the final halite of each rollout
+        """
+        size, horizon = efficiency.shape
+        cargo = constants.MAX_HALITE * self.return_ratio
+
+        bank = np.full(size, float(state.bank))
+        ships = float(state.ships)
+        pool = np.full(size, float(state.map_halite))
+        local_pool = np.zeros(size)
+        share = 0.0
+        map_trip = state.trip_distance if option.dropoff_map_trip is None else option.dropoff_map_trip
+        if option.spawn:
+            bank -= constants.SHIP_COST
+            ships += 1
+
+        for t in range(horizon):
+            if t == option.dropoff_in:
+                bank -= constants.DROPOFF_COST
+                share = option.dropoff_share
+                # The halite around the site, depleted as the map, is now mined from the dropoff only
+                local_pool = np.minimum(option.dropoff_halite * pool / max(state.map_halite, 1), pool)
+                pool = pool - local_pool
+
+            trip = 2 * state.trip_distance * trip_noise[:, t]
+            # Paths get cheaper as the map is depleted
+            path = state.path_halite * pool / max(state.map_halite, 1)
+            rate = self._delivery_rate(pool / state.cells, path, trip, efficiency[:, t], cargo)
+            delivered = ships * (1 - share) * rate
+            mined = delivered + state.opponent_ships * rate
+
+            if share:
+                local_trip = 2 * option.dropoff_trip * trip_noise[:, t]
+                local_rate = self._delivery_rate(local_pool / option.dropoff_cells, path, local_trip,
+                                                 efficiency[:, t], cargo)
+                # Once the site is mined out, its ships go back to the map, on shorter trips than before
+                near_trip = 2 * map_trip * trip_noise[:, t]
+                near_rate = self._delivery_rate(pool / state.cells, path, near_trip, efficiency[:, t], cargo)
+                local = local_rate >= near_rate
+                share_delivered = ships * share * np.where(local, local_rate, near_rate)
+                local_pool = np.maximum(local_pool - np.where(local, share_delivered, 0.0), 0.0)
+                mined = mined + np.where(local, 0.0, share_delivered)
+                delivered = delivered + share_delivered
+            pool = np.maximum(pool - mined, 0.0)
+
+            # Cargo still at sea when the game ends is lost
+            if horizon - t > state.trip_distance:
+                bank += delivered
+        return bank
+
+    def _separated(self, values):
+        """
+        :param values: The final halite of the rollouts of each option, drawn with the same random numbers
+        :return: Whether the best option is ahead of every other beyond the noise
+        """
+        best = max(range(len(values)), key=lambda i: values[i].mean())
+        for i, other in enumerate(values):
+            if i == best:
+                continue
+            # Rollouts are paired, the noise of the difference is much lower than the noise of each option
+            difference = values[best] - other
+            if difference.mean() < self.separation * difference.std() / np.sqrt(len(difference)):
+                return False
+        return True
+
+    def compare(self, state, options, deadline):
+        """
+        Evaluate options by running rollout batches until the deadline, at least one batch per option.
+        Evaluation stops earlier once the best option is clearly ahead.
+        :param state: The EconomyState at the current turn
+        :param options: A list of Option to compare
+        :param deadline: The time.time() at which evaluation stops
+        :return: A list of (mean final halite, standard error) by option
+        """
+        horizon = max(1, state.remaining_turns)
+        totals = [[] for _ in options]
+        while True:
+            # Common random numbers, so that differences between options are not noise
+            efficiency = self._rng.lognormal(0.0, 0.3, (self.batch_size, horizon))
+            trip_noise = self._rng.lognormal(0.0, 0.2, (self.batch_size, horizon))
+            for i, option in enumerate(options):
+                totals[i].append(self._simulate(state, option, efficiency, trip_noise))
+            values = [np.concatenate(batches) for batches in totals]
+            if time.time() >= deadline or self._separated(values):
+                break
+
+        return [(option_values.mean(), option_values.std() / np.sqrt(len(option_values)))
+                for option_values in values]
+
+    def best(self, state, options, deadline):
+        """
+        :return: The index of the option with the highest mean final halite, see compare
+        """
+        results = self.compare(state, options, deadline)
+        return max(range(len(options)), key=lambda i: results[i][0])
@@ -0,0 +1,177 @@
+import heapq
+
+from .positionals import Position
+
+# Tiles of each source cell sorted by distance, by (width, height, tile size), shared by every index of this size
+_TILE_ORDERS = {}
+
+
+class ShipIndex:
+    """
+    Spatial index of the ships of every player, rebuilt from each frame.
+
+    Holds an occupancy array (one ship or None per cell) and buckets of ships per square tile, so that
+    neighborhood queries only look at the cells or tiles around a position instead of every fleet.
+    """
+    def __init__(self, width, height, tile_size=8):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self._tiles_x = (width + tile_size - 1) // tile_size
+        self._tiles_y = (height + tile_size - 1) // tile_size
+        self._occupancy = [None] * (width * height)
+        self._buckets = [[] for _ in range(self._tiles_x * self._tiles_y)]
+        self._ships = []
+        self._tile_orders = _TILE_ORDERS.setdefault((width, height, tile_size), [None] * (width * height))
+
+    def rebuild(self, players):
+        """
+        Index the ships of all players for the current turn.
+        :param players: The player objects
+        :return: nothing.
+        """
+        # Only clear what was set on the previous turn
+        for ship in self._ships:
+            self._occupancy[ship.position.y * self.width + ship.position.x] = None
+        for bucket in self._buckets:
+            bucket.clear()
+
+        self._ships = []
+        for player in players:
+            for ship in player.get_ships():
+                self._ships.append(ship)
+                self._occupancy[ship.position.y * self.width + ship.position.x] = ship
+                self._buckets[self._tile_of(ship.position)].append(ship)
+
+    def _tile_of(self, position):
+        return (position.y // self.tile_size) * self._tiles_x + position.x // self.tile_size
+
+    def _distance(self, source, target):
+        dx = abs(source.x - target.x)
+        dy = abs(source.y - target.y)
+        return min(dx, self.width - dx) + min(dy, self.height - dy)
+
+    @staticmethod
+    def _axis_distance(p, low, high, length):
+        # Toroidal distance between a coordinate and the range [low, high)
+        if low <= p < high:
+            return 0
+        return min((low - p) % length, (p - high + 1) % length)
+
+    def _tiles_by_distance(self, source):
+        """
+        :return: A list of (distance from source to the tile, tile index), closest tiles first
+        """
+        tiles = self._tile_orders[source.y * self.width + source.x]
+        if tiles is None:
+            tiles = self._tile_orders[source.y * self.width + source.x] = self._sort_tiles(source)
+        return tiles
+
+    def precompute(self):
+        """
+        Sort the tiles of every cell, e.g. in a warm process before the games start.
+        :return: nothing.
+        """
+        for y in range(self.height):
+            for x in range(self.width):
+                if self._tile_orders[y * self.width + x] is None:
+                    self._tile_orders[y * self.width + x] = self._sort_tiles(Position(x, y))
+
+    def _sort_tiles(self, source):
+        tiles = []
+        for ty in range(self._tiles_y):
+            y0 = ty * self.tile_size
+            dy = self._axis_distance(source.y, y0, min(y0 + self.tile_size, self.height), self.height)
+            for tx in range(self._tiles_x):
+                x0 = tx * self.tile_size
+                dx = self._axis_distance(source.x, x0, min(x0 + self.tile_size, self.width), self.width)
+                tiles.append((dx + dy, ty * self._tiles_x + tx))
+        tiles.sort()
+        return tiles
+
+    @staticmethod
+    def _keep(ship, owner, exclude_owner):
+        return (owner is None or ship.owner == owner) and (exclude_owner is None or ship.owner != exclude_owner)
+
+    def at(self, position):
+        """
+        :param position: A normalized position
+        :return: The ship on this cell, or None
+        """
+        return self._occupancy[position.y * self.width + position.x]
+
+    def adjacent(self, position, owner=None, exclude_owner=None):
+        """
+        Returns the ships on the four cells around a position.
+        :param position: A normalized position
+        :param owner: Optional player id, to keep only the ships of this player
+        :param exclude_owner: Optional player id, to ignore the ships of this player
+        :return: A list of ships
+        """
+        ships = []
+        for x, y in ((position.x, position.y - 1), (position.x, position.y + 1),
+                     (position.x + 1, position.y), (position.x - 1, position.y)):
+            ship = self._occupancy[(y % self.height) * self.width + x % self.width]
+            if ship is not None and self._keep(ship, owner, exclude_owner):
+                ships.append(ship)
+        return ships
+
+    def ships_within(self, position, radius, owner=None, exclude_owner=None):
+        """
+        Returns the ships within a Manhattan radius, accounting for wrap-around.
+        :param position: A normalized position
+        :param radius: The maximum distance of the ships
+        :param owner: Optional player id, to keep only the ships of this player
+        :param exclude_owner: Optional player id, to ignore the ships of this player
+        :return: A list of ships
+        """
+        ships = []
+        if 2 * radius + 1 <= self.tile_size:
+            # Small radius, scan the diamond on the occupancy array
+            for dy in range(-radius, radius + 1):
+                y = (position.y + dy) % self.height
+                span = radius - abs(dy)
+                for dx in range(-span, span + 1):
+                    ship = self._occupancy[y * self.width + (position.x + dx) % self.width]
+                    if ship is not None and self._keep(ship, owner, exclude_owner):
+                        ships.append(ship)
+            return ships
+
+        for distance, tile in self._tiles_by_distance(position):
+            if distance > radius:
+                break
+            for ship in self._buckets[tile]:
+                if self._keep(ship, owner, exclude_owner) and self._distance(position, ship.position) <= radius:
+                    ships.append(ship)
+        return ships
+
+    def count_within(self, position, radius, owner=None, exclude_owner=None):
+        """
+        :return: The number of ships within a Manhattan radius, see ships_within
+        """
+        return len(self.ships_within(position, radius, owner, exclude_owner))
+
+    def nearest(self, position, k=1, owner=None, exclude_owner=None):
+        """
+        Returns the k closest ships of a position, accounting for wrap-around.
+        :param position: A normalized position
+        :param k: The maximum number of ships to return
+        :param owner: Optional player id, to keep only the ships of this player
+        :param exclude_owner: Optional player id, to ignore the ships of this player
+        :return: A list of (distance, ship), closest first
+        """
+        # Max-heap on distance of the best candidates found so far
+        best = []
+        for distance, tile in self._tiles_by_distance(position):
+            if len(best) == k and distance > -best[0][0]:
+                break
+            for ship in self._buckets[tile]:
+                if not self._keep(ship, owner, exclude_owner):
+                    continue
+                # The root is the farthest candidate, the highest id among equidistant ones
+                item = (-self._distance(position, ship.position), -ship.id, ship)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item[:2] > best[0][:2]:
+                    heapq.heapreplace(best, item)
+        return [(-d, ship) for d, _, ship in sorted(best, key=lambda item: (-item[0], -item[1]))]
@@ -0,0 +1,150 @@
+"""
+Binary snapshots of the game state, recorded turn by turn.
+
+A snapshot is a set of append-only files sharing a base path, each one holding
+fixed-width little-endian records so they can be memory-mapped as NumPy arrays:
+
+* <base>.meta      header: magic, version, width, height, number of players, my id
+* <base>.cells     turn, x, y, halite    (turn 0 holds the whole initial map, then only changed cells)
+* <base>.players   turn, player, number of ships, number of dropoffs, halite
+* <base>.ships     turn, owner, ship id, x, y, halite
+* <base>.dropoffs  turn, owner, dropoff id, x, y
+* <base>.commands  turn, ship id (-1 for a spawn), command, direction
+"""
+import os
+import struct
+
+from . import commands
+
+MAGIC = b"HLTS"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHHHH")
+
+RECORDS = {
+    "cells": (struct.Struct("<hhhi"),
+              [("turn", "<i2"), ("x", "<i2"), ("y", "<i2"), ("halite", "<i4")]),
+    "players": (struct.Struct("<hhhhi"),
+                [("turn", "<i2"), ("player", "<i2"), ("ships", "<i2"), ("dropoffs", "<i2"), ("halite", "<i4")]),
+    "ships": (struct.Struct("<hhihhi"),
+              [("turn", "<i2"), ("owner", "<i2"), ("id", "<i4"), ("x", "<i2"), ("y", "<i2"), ("halite", "<i4")]),
+    "dropoffs": (struct.Struct("<hhihh"),
+                 [("turn", "<i2"), ("owner", "<i2"), ("id", "<i4"), ("x", "<i2"), ("y", "<i2")]),
+    "commands": (struct.Struct("<hicc"),
+                 [("turn", "<i2"), ("ship_id", "<i4"), ("command", "S1"), ("direction", "S1")]),
+}
+
+
+class SnapshotWriter:
+    """
+    Streams the state of each turn of a game to snapshot files.
+    """
+    def __init__(self, base_path, game):
+        """
+        Creates the snapshot files and writes the header and the initial map.
+        :param base_path: The path of the files, without extension
+        :param game: The game object, after its initialization
+        """
+        self.base_path = base_path
+        self._files = {name: open("{}.{}".format(base_path, name), "ab") for name in RECORDS}
+
+        game_map = game.game_map
+        with open("{}.meta".format(base_path), "wb") as meta:
+            meta.write(_HEADER.pack(MAGIC, VERSION, game_map.width, game_map.height,
+                                    len(game.players), game.my_id))
+
+        pack = RECORDS["cells"][0].pack
+        self._files["cells"].write(b"".join(pack(0, x, y, game_map._cells[y][x].halite_amount)
+                                            for y in range(game_map.height)
+                                            for x in range(game_map.width)))
+        self._files["cells"].flush()
+
+    def write_frame(self, game):
+        """
+        Append the state of the current turn.
+        :param game: The game object, after update_frame
+        :return: nothing.
+        """
+        turn = game.turn_number
+        game_map = game.game_map
+
+        pack = RECORDS["cells"][0].pack
+        self._files["cells"].write(b"".join(pack(turn, position.x, position.y, game_map[position].halite_amount)
+                                            for position in game_map.updated_positions))
+
+        players, ships, dropoffs = [], [], []
+        pack_player = RECORDS["players"][0].pack
+        pack_ship = RECORDS["ships"][0].pack
+        pack_dropoff = RECORDS["dropoffs"][0].pack
+        for player in game.players.values():
+            player_ships = player.get_ships()
+            player_dropoffs = player.get_dropoffs()
+            players.append(pack_player(turn, player.id, len(player_ships), len(player_dropoffs),
+                                       player.halite_amount))
+            ships.extend(pack_ship(turn, player.id, ship.id, ship.position.x, ship.position.y, ship.halite_amount)
+                         for ship in player_ships)
+            dropoffs.extend(pack_dropoff(turn, player.id, dropoff.id, dropoff.position.x, dropoff.position.y)
+                            for dropoff in player_dropoffs)
+        self._files["players"].write(b"".join(players))
+        self._files["ships"].write(b"".join(ships))
+        self._files["dropoffs"].write(b"".join(dropoffs))
+
+    def write_commands(self, turn, command_list):
+        """
+        Append the commands sent to the engine this turn, and flush the turn to disk.
+        :param turn: The turn number
+        :param command_list: The list of commands, as sent to the engine
+        :return: nothing.
+        """
+        pack = RECORDS["commands"][0].pack
+        records = []
+        for command in command_list:
+            parts = command.split()
+            if parts[0] == commands.GENERATE:
+                records.append(pack(turn, -1, commands.GENERATE.encode(), b" "))
+            elif parts[0] == commands.CONSTRUCT:
+                records.append(pack(turn, int(parts[1]), commands.CONSTRUCT.encode(), b" "))
+            else:
+                records.append(pack(turn, int(parts[1]), commands.MOVE.encode(), parts[2].encode()))
+        self._files["commands"].write(b"".join(records))
+
+        for file in self._files.values():
+            file.flush()
+
+    def close(self):
+        """
+        Close the snapshot files.
+        :return: nothing.
+        """
+        for file in self._files.values():
+            file.close()
+
+
+def load_snapshot(base_path):
+    """
+    Maps a snapshot in memory without parsing it.
+    :param base_path: The path of the files, without extension
+    :return: A tuple (header dict, dict of record name -> NumPy structured array)
+    """
+    # NumPy is only needed to read snapshots, not to record them during a game
+    import numpy as np
+
+    with open("{}.meta".format(base_path), "rb") as meta:
+        magic, version, width, height, num_players, my_id = _HEADER.unpack(meta.read(_HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("{} is not a snapshot of version {}".format(base_path, VERSION))
+    header = {"width": width, "height": height, "num_players": num_players, "my_id": my_id}
+
+    arrays = {}
+    for name, (record, fields) in RECORDS.items():
+        dtype = np.dtype(fields)
+        assert dtype.itemsize == record.size
+        path = "{}.{}".format(base_path, name)
+        # Ignore a record truncated by a bot killed while writing
+        count = os.path.getsize(path) // dtype.itemsize
+        if count:
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+        else:
+            # An empty file cannot be mapped
+            arrays[name] = np.zeros(0, dtype=dtype)
+    return header, arrays
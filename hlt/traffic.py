@@ -0,0 +1,149 @@
+from . import constants
+from .positionals import Direction
+
+
+class Intent:
+    """
+    Holds what a ship wants to do around a structure
+    """
+    INBOUND = "inbound"
+    OUTBOUND = "outbound"
+
+
+class TrafficController:
+    """
+    Resolves jointly the moves of our ships in the neighborhood of a structure.
+
+    Two opposite neighbors of the structure are inbound lanes and the two others outbound lanes, so that
+    ships coming to deposit do not block ships leaving. The moves of the ships of the window, and whether
+    the structure is left free for a spawn, are chosen by an exhaustive search of the best joint plan.
+    """
+    # Value of keeping the shipyard free for a spawn, compared to one turn of distance of a ship
+    SPAWN_VALUE = 30
+    # Value of depositing, on top of the cargo
+    DEPOSIT_VALUE = 50
+
+    def __init__(self, game_map, radius=2, max_ships=6):
+        """
+        :param game_map: The game map
+        :param radius: The distance to the structure of the ships handled
+        :param max_ships: The maximum number of ships resolved jointly, the others are left to the caller
+        """
+        self.game_map = game_map
+        self.radius = radius
+        self.max_ships = max_ships
+
+    @staticmethod
+    def lanes(position):
+        """
+        Lanes alternate between structures, so that neighbor structures do not send ships against each other.
+        :param position: The position of the structure
+        :return: A tuple (inbound directions, outbound directions)
+        """
+        if (position.x + position.y) % 2 == 0:
+            return [Direction.North, Direction.South], [Direction.East, Direction.West]
+        return [Direction.East, Direction.West], [Direction.North, Direction.South]
+
+    def _move_scores(self, ship, intent, target, structure, inbound_cells, outbound_cells):
+        """
+        :return: A list of (score, direction, next position) of the possible moves of a ship
+        """
+        game_map = self.game_map
+        can_move = ship.halite_amount >= game_map[ship.position].halite_amount // constants.MOVE_COST_RATIO
+        directions = [Direction.Still] + (Direction.get_all_cardinals() if can_move else [])
+
+        scores = []
+        for direction in directions:
+            position = game_map.normalize(ship.position.directional_offset(direction))
+            if direction != Direction.Still and game_map[position].is_occupied and \
+                    game_map[position].ship.owner != ship.owner:
+                continue
+
+            key = (position.x, position.y)
+            if intent == Intent.INBOUND:
+                score = -10 * game_map.calculate_distance(position, structure)
+                if position == structure:
+                    score += self.DEPOSIT_VALUE + ship.halite_amount // 10
+                if key in outbound_cells:
+                    score -= 5
+            else:
+                score = -10 * game_map.calculate_distance(position, target)
+                if position == structure:
+                    score -= self.DEPOSIT_VALUE
+                if key in inbound_cells:
+                    score -= 5
+            if direction == Direction.Still:
+                score -= 1
+            scores.append((score, direction, position))
+        scores.sort(key=lambda item: item[0], reverse=True)
+        return scores
+
+    def resolve(self, structure, ships, intents, blocked, spawn=False, stacking=()):
+        """
+        Find the best joint moves of the ships around a structure.
+        :param structure: The normalized position of the structure
+        :param ships: Our ships within the radius of the structure
+        :param intents: A dict ship id -> (Intent, target position)
+        :param blocked: A set of (x, y) cells no ship can end on, e.g. our ships out of the window
+        :param spawn: Whether a spawn is wanted on the structure this turn
+        :param stacking: Ids of the ships which can end on the structure with other ones, i.e. collide on purpose
+        at the end of the game, other ships never share a cell
+        :return: A tuple (dict ship id -> direction, whether the structure is left free for a spawn)
+        """
+        inbound, outbound = self.lanes(structure)
+        inbound_cells = {(p.x, p.y) for p in (self.game_map.normalize(structure.directional_offset(d))
+                                             for d in inbound)}
+        outbound_cells = {(p.x, p.y) for p in (self.game_map.normalize(structure.directional_offset(d))
+                                              for d in outbound)}
+
+        # Ships closest to the structure first, so that the window always holds the ones which can free it,
+        # then ships with the most halite to deposit, they get the best moves when scores tie
+        ships = sorted(ships, key=lambda ship: (self.game_map.calculate_distance(ship.position, structure),
+                                                intents[ship.id][0] != Intent.INBOUND, -ship.halite_amount))
+        # Ships beyond the limit are left to the caller, and stay where they are meanwhile
+        blocked = set(blocked) | {(ship.position.x, ship.position.y) for ship in ships[self.max_ships:]}
+        ships = ships[:self.max_ships]
+        options = [self._move_scores(ship, intents[ship.id][0], intents[ship.id][1], structure,
+                                     inbound_cells, outbound_cells) for ship in ships]
+        # Best score reachable by the ships not placed yet, to prune the search
+        remaining_best = [0] * (len(ships) + 1)
+        for i in range(len(ships) - 1, -1, -1):
+            remaining_best[i] = remaining_best[i + 1] + options[i][0][0]
+
+        structure_key = (structure.x, structure.y)
+        best = {"score": None, "moves": {}, "spawn": False}
+        # Number of ships ending on each cell in the current partial plan, and of those which cannot stack
+        occupied = {}
+        solid = {}
+        moves = {}
+
+        def search(i, score, structure_used):
+            bound = score + remaining_best[i] + (self.SPAWN_VALUE if spawn and not structure_used else 0)
+            if best["score"] is not None and bound <= best["score"]:
+                return
+            if i == len(ships):
+                free = spawn and not structure_used
+                total = score + (self.SPAWN_VALUE if free else 0)
+                if best["score"] is None or total > best["score"]:
+                    best.update(score=total, moves=dict(moves), spawn=free)
+                return
+
+            stacks = ships[i].id in stacking
+            for move_score, direction, position in options[i]:
+                key = (position.x, position.y)
+                if key in blocked:
+                    continue
+                if occupied.get(key) and not (stacks and key == structure_key and not solid.get(key)):
+                    continue
+                occupied[key] = occupied.get(key, 0) + 1
+                if not stacks:
+                    solid[key] = solid.get(key, 0) + 1
+                moves[ships[i].id] = direction
+                search(i + 1, score + move_score, structure_used or key == structure_key)
+                del moves[ships[i].id]
+                occupied[key] -= 1
+                if not stacks:
+                    solid[key] -= 1
+
+        search(0, 0, False)
+        return best["moves"], best["spawn"]
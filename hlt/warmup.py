@@ -0,0 +1,38 @@
+"""
+Work done once by a long-running process before it serves games, see bot_server.py.
+
+Processes forked afterwards inherit the imported modules and the tables sized to each map,
+so a game starts without paying for them.
+"""
+import importlib
+import os
+import pkgutil
+
+from .interest import DEFAULT_RADIUS, diamond_kernel
+from .ship_index import ShipIndex
+
+# Sizes of the maps of Halite III games
+MAP_SIZES = (32, 40, 48, 56, 64)
+
+
+def import_all():
+    """
+    Import every module of the hlt package, and so their dependencies.
+    :return: The list of the imported module names
+    """
+    names = []
+    for module in pkgutil.iter_modules([os.path.dirname(__file__)]):
+        names.append(importlib.import_module("{}.{}".format(__package__, module.name)).__name__)
+    return names
+
+
+def precompute(sizes=MAP_SIZES):
+    """
+    Build the tables shared by every game on a map size: the interest map kernel and the tile orders of the
+    ship index. Per-game state, e.g. annotation layers and occupancy arrays, is still allocated by each game.
+    :param sizes: The widths of the square maps to prepare
+    :return: nothing.
+    """
+    for size in sizes:
+        diamond_kernel(size, size, DEFAULT_RADIUS)
+        ShipIndex(size, size).precompute()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# Python 3.6
+
+"""
+Metrics of games and ships computed from Halite III replay files.
+
+Replays are decompressed and parsed as a stream, one frame at a time, and analyzed in parallel
+on all cores. Per-game, per-ship and per-turn metrics are written to Parquet files, and a summary by replay
+directory and bot name is printed, e.g. to compare two versions of the bot:
+
+    python3 replay_analysis.py replays-v1/ replays-v2/ --output analysis/
+
+Requires: zstandard, ijson and pyarrow (python3 -m pip install zstandard ijson pyarrow)
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+from collections import defaultdict
+
+import ijson
+import pyarrow
+import pyarrow.parquet
+import zstandard
+from ijson.common import ObjectBuilder
+
+# Top-level keys of a replay which are used, others (e.g. the production map) are skipped
+KEPT_KEYS = ("full_frames.item", "players", "game_statistics")
+
+
+def stream_replay(path):
+    """
+    Read a replay without loading it whole.
+    :param path: The path of a .hlt replay, zstd compressed or plain JSON
+    :return: A generator of (key, value): ("full_frames.item", frame) for each frame, then the other kept keys
+    """
+    with open(path, "rb") as file:
+        compressed = file.read(4) == b"\x28\xb5\x2f\xfd"
+        file.seek(0)
+        stream = zstandard.ZstdDecompressor().stream_reader(file) if compressed else file
+
+        builder, building = None, None
+        for prefix, event, value in ijson.parse(stream):
+            if builder is None:
+                if prefix not in KEPT_KEYS or event in ("map_key", "end_array", "end_map"):
+                    continue
+                builder, building = ObjectBuilder(), prefix
+            builder.event(event, value)
+            # A value is complete when the container opened at its prefix is closed
+            if prefix == building and event in ("end_map", "end_array"):
+                yield building, builder.value
+                builder, building = None, None
+
+
+class ShipStats:
+    """
+    Metrics of one ship, built frame by frame.
+    """
+    def __init__(self, ship_id, owner, turn):
+        self.ship_id = ship_id
+        self.owner = owner
+        self.spawn_turn = turn
+        self.last_turn = turn
+        self.mined = 0
+        self.deposited = 0
+        self.idle_turns = 0
+        self.collided = False
+        self.position = None
+        self.energy = 0
+
+
+def analyze_replay(job):
+    """
+    Compute the metrics of a game.
+    :param job: A tuple (source label, replay path)
+    :return: A tuple (game rows, ship rows, turn rows), with a game row and a turn row per player
+    """
+    source, path = job
+    game_id = os.path.splitext(os.path.basename(path))[0]
+    ships = {}
+    first_dropoff = {}
+    # Dropoff cells of each player, built so far
+    dropoffs = defaultdict(set)
+    # Cargos emptied, kept until the shipyards are known: (ship, amount, position, on a dropoff)
+    emptied = []
+    # Halite mined by player, for each turn
+    mined_by_turn = []
+    collisions = defaultdict(int)
+    deposited = {}
+    energy = {}
+    players, statistics = [], {}
+    turn = 0
+
+    for key, value in stream_replay(path):
+        if key == "players":
+            players = value
+        elif key == "game_statistics":
+            statistics = {stats["player_id"]: stats for stats in value.get("player_statistics", [])}
+        elif key == "full_frames.item":
+            mined = defaultdict(int)
+            for event in value.get("events", []):
+                if event["type"] == "construct":
+                    first_dropoff.setdefault(event["owner_id"], turn)
+                    dropoffs[event["owner_id"]].add((event["location"]["x"], event["location"]["y"]))
+                elif event["type"] == "shipwreck":
+                    for ship_id in event["ships"]:
+                        if ship_id in ships:
+                            ships[ship_id].collided = True
+                            collisions[ships[ship_id].owner] += 1
+
+            for owner, entities in value.get("entities", {}).items():
+                owner = int(owner)
+                for ship_id, entity in entities.items():
+                    ship_id = int(ship_id)
+                    ship = ships.get(ship_id)
+                    if ship is None:
+                        ship = ships[ship_id] = ShipStats(ship_id, owner, turn)
+                    position = (entity["x"], entity["y"])
+                    gain = entity["energy"] - ship.energy
+                    if gain > 0:
+                        ship.mined += gain
+                        mined[owner] += gain
+                    elif gain < 0 and entity["energy"] == 0:
+                        # A cargo is also emptied by a move cost, only a cargo emptied on a structure is a deposit.
+                        # Players, and so shipyards, come after frames in replays
+                        emptied.append((ship, -gain, position, position in dropoffs[owner]))
+                    elif gain == 0 and position == ship.position:
+                        ship.idle_turns += 1
+                    ship.position, ship.energy, ship.last_turn = position, entity["energy"], turn
+
+            mined_by_turn.append(mined)
+            deposited = value.get("deposited", deposited)
+            energy = value.get("energy", energy)
+            turn += 1
+
+    shipyards = {player["player_id"]: (player["factory_location"]["x"], player["factory_location"]["y"])
+                 for player in players}
+    for ship, amount, position, on_dropoff in emptied:
+        if on_dropoff or position == shipyards.get(ship.owner):
+            ship.deposited += amount
+
+    game_rows = []
+    for player in players:
+        player_id = player["player_id"]
+        player_ships = [ship for ship in ships.values() if ship.owner == player_id]
+        mined = sum(turn_mined[player_id] for turn_mined in mined_by_turn)
+        game_rows.append({
+            "source": source,
+            "game": game_id,
+            "player": player_id,
+            "name": player["name"],
+            "rank": statistics.get(player_id, {}).get("rank", -1),
+            "turns": turn,
+            "final_halite": int(energy.get(str(player_id), 0)),
+            "deposited": int(deposited.get(str(player_id), 0)),
+            "mined": mined,
+            "mined_per_turn": mined / max(1, turn),
+            "ships_built": len(player_ships),
+            "collisions": collisions[player_id],
+            "idle_share": sum(ship.idle_turns for ship in player_ships) /
+            max(1, sum(ship.last_turn - ship.spawn_turn + 1 for ship in player_ships)),
+            "first_dropoff_turn": first_dropoff.get(player_id, -1),
+        })
+
+    ship_rows = [{
+        "source": source,
+        "game": game_id,
+        "player": ship.owner,
+        "ship": ship.ship_id,
+        "spawn_turn": ship.spawn_turn,
+        "last_turn": ship.last_turn,
+        "mined": ship.mined,
+        "deposited": ship.deposited,
+        "idle_turns": ship.idle_turns,
+        "collided": ship.collided,
+    } for ship in ships.values()]
+
+    turn_rows = [{
+        "source": source,
+        "game": game_id,
+        "turn": turn,
+        "player": player["player_id"],
+        "mined": turn_mined[player["player_id"]],
+    } for turn, turn_mined in enumerate(mined_by_turn) for player in players]
+    return game_rows, ship_rows, turn_rows
+
+
+def to_table(rows):
+    """
+    :param rows: A list of dicts with the same keys
+    :return: A pyarrow table with one column per key
+    """
+    if not rows:
+        return pyarrow.table({})
+    return pyarrow.table({key: [row[key] for row in rows] for key in rows[0]})
+
+
+def summarize(game_rows):
+    """
+    Print the mean metrics of each bot, by replay directory.
+    :param game_rows: The game rows of every replay
+    :return: nothing.
+    """
+    columns = ("rank", "final_halite", "mined_per_turn", "ships_built", "collisions", "idle_share",
+               "first_dropoff_turn")
+    groups = defaultdict(list)
+    for row in game_rows:
+        groups[(row["source"], row["name"])].append(row)
+
+    print("{:<30} {:<20} {:>6} ".format("source", "bot", "games") + " ".join("{:>18}".format(c) for c in columns))
+    for (source, name), rows in sorted(groups.items()):
+        means = []
+        for column in columns:
+            values = [row[column] for row in rows if row[column] != -1]
+            means.append(sum(values) / len(values) if values else float("nan"))
+        print("{:<30} {:<20} {:>6} ".format(source[-30:], name[:20], len(rows)) +
+              " ".join("{:>18.2f}".format(mean) for mean in means))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute metrics from Halite III replays")
+    parser.add_argument("directories", nargs="+", help="directories of .hlt replays, e.g. one per bot version")
+    parser.add_argument("--output", default="analysis", help="directory of the Parquet files")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="replays analyzed in parallel")
+    args = parser.parse_args()
+
+    jobs = [(directory.rstrip("/"), path) for directory in args.directories
+            for path in sorted(glob.glob(os.path.join(directory, "*.hlt")))]
+
+    game_rows, ship_rows, turn_rows = [], [], []
+    with multiprocessing.Pool(args.processes) as pool:
+        for games, game_ships, game_turns in pool.imap_unordered(analyze_replay, jobs, chunksize=4):
+            game_rows.extend(games)
+            ship_rows.extend(game_ships)
+            turn_rows.extend(game_turns)
+
+    os.makedirs(args.output, exist_ok=True)
+    pyarrow.parquet.write_table(to_table(game_rows), os.path.join(args.output, "games.parquet"))
+    pyarrow.parquet.write_table(to_table(ship_rows), os.path.join(args.output, "ships.parquet"))
+    pyarrow.parquet.write_table(to_table(turn_rows), os.path.join(args.output, "turns.parquet"))
+    summarize(game_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from hlt import constants
+from hlt.rollouts import EconomyState, Option, RolloutEngine
+
+constants.load_constants({
+    'NEW_ENTITY_ENERGY_COST': 1000, 'DROPOFF_COST': 4000, 'MAX_ENERGY': 1000, 'MAX_TURNS': 500,
+    'EXTRACT_RATIO': 4, 'MOVE_COST_RATIO': 10, 'INSPIRATION_ENABLED': True, 'INSPIRATION_RADIUS': 4,
+    'INSPIRATION_SHIP_COUNT': 2, 'INSPIRED_EXTRACT_RATIO': 4, 'INSPIRED_BONUS_MULTIPLIER': 2.0,
+    'INSPIRED_MOVE_COST_RATIO': 10,
+})
+
+
+def spawn_gain(width, ships, mean_halite):
+    cells = width * width
+    # Uniform halite: the 10th percentile is a fifth of the mean, capped at the mining treshold as in MyBot
+    path_halite = min(mean_halite / 5, constants.MAX_HALITE * 5 / 100)
+    trip_distance = width / 4 if ships == 0 else 8
+    state = EconomyState(500, ships, 5000, mean_halite * cells, cells, 3 * ships, trip_distance, path_halite)
+    # Same seed, so that every state is evaluated on the same draws
+    results = RolloutEngine(seed=0, return_ratio=0.85).compare(state, [Option(), Option(spawn=True)], 0)
+    return results[1][0] - results[0][0]
+
+
+def test_spawn_value_grows_with_map_halite():
+    for width in (32, 48, 64):
+        for ships in (0, 10, 30):
+            gains = [spawn_gain(width, ships, mean_halite) for mean_halite in (50, 100, 200, 300, 400, 600, 800)]
+            assert all(later >= earlier for earlier, later in zip(gains, gains[1:])), (width, ships, gains)
+
+
+def test_first_ship_pays_on_rich_large_maps():
+    for width in (48, 64):
+        for mean_halite in (200, 300, 400):
+            assert spawn_gain(width, 0, mean_halite) > 0
+
+
+def test_rich_distant_dropoff_pays_for_itself():
+    cells = 64 * 64
+    # Ships mine far from the shipyard, a quarter of the fleet is closer to the site
+    state = EconomyState(240, 60, 8000, 100 * cells, cells, 120, 16, 20)
+    site = dict(dropoff_share=1 / 4, dropoff_trip=10 / 3, dropoff_halite=40000, dropoff_cells=61, dropoff_map_trip=6)
+    results = RolloutEngine(seed=0, return_ratio=0.85).compare(state, [Option(dropoff_in=0, **site), Option()], 0)
+    assert results[0][0] - results[1][0] > constants.DROPOFF_COST
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# Python 3.6
+
+"""
+Self-play tuner of the MyBot heuristics parameters (see hlt/parameters.py).
+
+Candidates are random parameter sets around the defaults. They are raced with successive halving:
+every round, each remaining candidate plays more games against the default bot, the games being run
+in parallel on all cores, and only the best 1/eta candidates are kept for the next round.
+Every game result is checkpointed, so an interrupted run resumes where it stopped.
+The logs of the bots of each game are kept in <work-dir>/games/.
+
+Usage: python3 tuner.py --work-dir tuning/ --candidates 27 --games 4 [--engine ./halite]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+
+from hlt.parameters import Parameters
+
+BOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "MyBot.py")
+
+# Range explored for each parameter
+SEARCH_SPACE = {
+    "interesting_treshold": (1 / 100, 15 / 100),
+    "target_candidates": (1, 8),
+    "return_full_ratio": (85 / 100, 100 / 100),
+    "return_ratio": (60 / 100, 95 / 100),
+    "rush_margin": (2, 15),
+    "endgame_margin": (0, 8),
+    "enemy_risk_treshold": (20 / 100, 100 / 100),
+    "dropoff_min_distance": (8, 24),
+    "dropoff_min_fleet": (5, 30),
+    "dropoff_last_turn": (200, 450),
+    "dropoff_site_radius": (0, 5),
+    "dropoff_site_ratio": (70 / 100, 100 / 100),
+    "spawn_turns_ratio": (30 / 100, 75 / 100),
+    "min_fleet": (1, 15),
+}
+
+
+def sample_parameters(rng):
+    """
+    Draw a random candidate in the search space.
+    :param rng: The random generator
+    :return: The parameters as a dict
+    """
+    values = {}
+    for name, (low, high) in SEARCH_SPACE.items():
+        if isinstance(Parameters.DEFAULTS[name], int):
+            values[name] = rng.randint(low, high)
+        else:
+            values[name] = round(rng.uniform(low, high), 4)
+    return Parameters(**values).to_dict()
+
+
+def play_game(job):
+    """
+    Run one game of a candidate against the default bot.
+    :param job: A tuple (engine, candidate index, parameters file, seed, map size, game directory)
+    :return: A tuple (candidate index, seed, score), the score being the share of halite of the candidate
+    """
+    engine, index, params_path, seed, size, game_dir = job
+    # Bots write their logs in their working directory, each game has its own so that parallel games do not
+    # overwrite each other's logs
+    os.makedirs(game_dir, exist_ok=True)
+    candidate = "python3 {} --params {}".format(BOT_PATH, os.path.abspath(params_path))
+    baseline = "python3 {}".format(BOT_PATH)
+    # Swap seats every other seed, so that the spawn position does not bias the results
+    bots = [candidate, baseline] if seed % 2 == 0 else [baseline, candidate]
+    command = [os.path.abspath(engine), "--results-as-json", "--no-logs", "--no-replay", "--seed", str(seed),
+               "--width", str(size), "--height", str(size)] + bots
+    output = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=game_dir,
+                            check=True, universal_newlines=True).stdout
+    stats = json.loads(output)["stats"]
+    candidate_id = "0" if seed % 2 == 0 else "1"
+    baseline_id = "1" if seed % 2 == 0 else "0"
+    mine, theirs = stats[candidate_id]["score"], stats[baseline_id]["score"]
+    return index, seed, mine / max(1, mine + theirs)
+
+
+class SuccessiveHalving:
+    """
+    State of a tuning run, saved to its working directory after every game.
+    """
+    def __init__(self, work_dir, candidates, games, eta, sizes, seed):
+        self.work_dir = work_dir
+        self.eta = eta
+        self.sizes = sizes
+        self.games = games
+        self.round = 0
+        rng = random.Random(seed)
+        # The defaults are always part of the race
+        self.candidates = [Parameters().to_dict()] + [sample_parameters(rng) for _ in range(candidates - 1)]
+        self.alive = list(range(candidates))
+        # Scores by candidate index, then by seed
+        self.results = {}
+
+    @property
+    def checkpoint_path(self):
+        return os.path.join(self.work_dir, "checkpoint.json")
+
+    def game_dir(self, index, seed):
+        return os.path.join(self.work_dir, "games", "candidate-{}-seed-{}".format(index, seed))
+
+    def params_path(self, index):
+        return os.path.join(self.work_dir, "candidate-{}.json".format(index))
+
+    def save(self):
+        state = {key: getattr(self, key) for key in ("eta", "sizes", "games", "round", "candidates", "alive")}
+        state["results"] = {str(index): scores for index, scores in self.results.items()}
+        temporary = self.checkpoint_path + ".tmp"
+        with open(temporary, "w") as file:
+            json.dump(state, file, indent=2)
+        os.replace(temporary, self.checkpoint_path)
+
+    @staticmethod
+    def load(work_dir):
+        tuner = SuccessiveHalving.__new__(SuccessiveHalving)
+        tuner.work_dir = work_dir
+        with open(os.path.join(work_dir, "checkpoint.json")) as file:
+            state = json.load(file)
+        for key, value in state.items():
+            setattr(tuner, key, value)
+        tuner.results = {int(index): scores for index, scores in state["results"].items()}
+        return tuner
+
+    def games_in_round(self):
+        # Survivors play eta times more games each round
+        return self.games * self.eta ** self.round
+
+    def mean_score(self, index):
+        scores = self.results.get(index, {})
+        return sum(scores.values()) / len(scores) if scores else 0
+
+    def run(self, engine, processes):
+        """
+        Race the candidates until one is left.
+        :param engine: The path of the game engine
+        :param processes: The number of games run in parallel
+        :return: The parameters of the best candidate
+        """
+        for index, values in enumerate(self.candidates):
+            Parameters(**values).save(self.params_path(index))
+
+        with multiprocessing.Pool(processes) as pool:
+            while len(self.alive) > 1:
+                seeds = range(self.games_in_round())
+                jobs = [(engine, index, self.params_path(index), seed, self.sizes[seed % len(self.sizes)],
+                         self.game_dir(index, seed))
+                        for index in self.alive for seed in seeds
+                        if str(seed) not in self.results.get(index, {})]
+                logging.info("Round {}: {} candidates, {} games to play".format(self.round, len(self.alive), len(jobs)))
+
+                for index, seed, score in pool.imap_unordered(play_game, jobs):
+                    self.results.setdefault(index, {})[str(seed)] = score
+                    self.save()
+
+                ranking = sorted(self.alive, key=self.mean_score, reverse=True)
+                for index in ranking:
+                    logging.info("  candidate {}: {:.4f}".format(index, self.mean_score(index)))
+                self.alive = ranking[:max(1, len(ranking) // self.eta)]
+                self.round += 1
+                self.save()
+
+        best = self.alive[0]
+        logging.info("Best candidate {}: {}".format(best, self.candidates[best]))
+        return Parameters(**self.candidates[best])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune MyBot parameters by self-play")
+    parser.add_argument("--work-dir", default="tuning", help="directory of the checkpoint and candidates files")
+    parser.add_argument("--engine", default="./halite", help="game engine executable")
+    parser.add_argument("--candidates", type=int, default=27, help="number of candidates in the first round")
+    parser.add_argument("--games", type=int, default=4, help="games per candidate in the first round")
+    parser.add_argument("--eta", type=int, default=3, help="1/eta of the candidates survive each round")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 40, 48, 56, 64], help="map sizes to play on")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="games played in parallel")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the candidates generation")
+    args = parser.parse_args()
+
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if os.path.exists(os.path.join(args.work_dir, "checkpoint.json")):
+        tuner = SuccessiveHalving.load(args.work_dir)
+        logging.info("Resuming run from {}, round {}".format(args.work_dir, tuner.round))
+    else:
+        os.makedirs(args.work_dir, exist_ok=True)
+        tuner = SuccessiveHalving(args.work_dir, args.candidates, args.games, args.eta, args.sizes, args.seed)
+        tuner.save()
+
+    best = tuner.run(args.engine, args.processes)
+    best.save(os.path.join(args.work_dir, "best.json"))
+
+
+if __name__ == "__main__":
+    main()